@@ -2,6 +2,7 @@ import disnake
 import utils
 import math
 from config.app_config import config
+from features.cog_registry import cog_registry
 
 
 class SystemView(disnake.ui.View):
@@ -63,55 +64,29 @@ class Dropdown(disnake.ui.Select):
     def create_select(self):
         """Creates one singular select from cogs"""
         options = []
-        dict_of_cogs = dict(zip(self.cogs[0], self.cogs[1]))
-        class_list = list(dict_of_cogs.values())
-
-        loaded = []
-        for value in class_list:
-            if value in self.bot.cogs:
-                loaded.append(value)
-
-        unloaded = list(set(class_list) - set(loaded))
-
-        loaded.sort()
-        unloaded.sort()
-
-        for file, cog in dict_of_cogs.items():
-            if cog in loaded:
+        for file, cog in zip(self.cogs[0], self.cogs[1]):
+            info = cog_registry.get(file)
+            if info is not None and info.loaded:
                 options.append(disnake.SelectOption(label=cog, value=file, emoji="✅"))
             else:
                 options.append(disnake.SelectOption(label=cog, value=file, emoji="❌"))
         return options
 
     def create_cog_lists(self):
-        cog_files = list(utils.get_all_cogs().keys())
-
-        # list out keys and values separately
-        file_list = self.cogs[0]
-        class_list = self.cogs[1]
-
-        loaded = []
-        for value in class_list:
-            if value in self.bot.cogs:
-                position = class_list.index(value)
-                loaded.append(file_list[position])
-
-        unloaded = list(set(cog_files) - set(loaded))
-        unloaded.sort()
-        return unloaded
+        return sorted(module for module, info in cog_registry.cogs.items() if not info.loaded)
 
     def create_embed(self, author_colour):
         embed = disnake.Embed(title="Cogs information and loading", colour=author_colour)
-        all_cogs = utils.get_all_cogs()
-
         cog_loaded = []
         cog_unloaded = []
-        for file, class_cog in all_cogs.items():
-            if class_cog in self.bot.cogs:
+        for file, info in cog_registry.cogs.items():
+            class_cog = info.name
+            if info.loaded:
+                duration = f" `{info.load_duration * 1000:.0f} ms`" if info.load_duration is not None else ""
                 if file not in config.extensions:
-                    cog_loaded.append(f"✅ **{class_cog}**\n\n")
+                    cog_loaded.append(f"✅ **{class_cog}**{duration}\n\n")
                 else:
-                    cog_loaded.append(f"✅ {class_cog}\n\n")
+                    cog_loaded.append(f"✅ {class_cog}{duration}\n\n")
             else:
                 if file in config.extensions:
                     cog_unloaded.append(f"❌ **{class_cog}**\n\n")
@@ -159,20 +134,20 @@ class Dropdown(disnake.ui.Select):
                 for cog in self.values:
                     if cog in unloaded:
                         try:
-                            self.bot.load_extension(f"cogs.{cog}")
+                            cog_registry.load(self.bot, cog)
                             print(utils.fill_message("cog_loaded", cog=cog))
                         except Exception as e:
                             await inter.send(f"Loading error\n`{e}`")
                     else:
                         try:
-                            self.bot.unload_extension(f"cogs.{cog}")
+                            cog_registry.unload(self.bot, cog)
                             print(utils.fill_message("cog_unloaded", cog=cog))
                         except Exception as e:
                             await inter.send(f"Unloading error\n`{e}`")
             else:
                 for cog in self.values:
                     try:
-                        self.bot.reload_extension(f"cogs.{cog}")
+                        cog_registry.reload(self.bot, cog)
                         print(utils.fill_message("cog_reloaded", cog=cog))
                         await inter.channel.send(utils.fill_message("cog_reloaded", cog=cog))
                     except Exception as e:
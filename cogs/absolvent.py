@@ -3,7 +3,6 @@ from disnake.ext import commands
 
 import unicodedata
 import requests
-from lxml import etree
 import re
 
 from repository import user_repo
@@ -42,6 +41,8 @@ class Absolvent(commands.Cog):
         :param thesis_web_id: ID from URL https://dspace.vutbr.cz/handle/11012/<num>
             can be discovered via https://dspace.vutbr.cz/handle/11012/19121
         """
+        from lxml import etree
+
         await inter.response.defer(with_message=True, ephemeral=True)
         if thesis_web_id == "19121":
             await inter.edit_original_message(Messages.absolvent_id_from_help)
@@ -1,15 +1,19 @@
-from typing import List
+from typing import Dict, List, Tuple
 
+import asyncio
 import datetime
 import disnake
 import utils
 from disnake.ext import commands
+from features.list_message_sender import send_list_of_messages
 from repository import pin_repo
-from repository.database.pin_map import PinMap
 
 from config.app_config import config
 from config.messages import Messages
 
+# at most this many mappings are resolved at once by pin list
+LIST_CONCURRENCY = 5
+
 
 class AutoPin(commands.Cog):
     def __init__(self, bot):
@@ -19,6 +23,22 @@ class AutoPin(commands.Cog):
         self.bot = bot
         self.repo = pin_repo.PinRepository()
 
+        # channel id -> id of message which should stay the first pin
+        self.pin_map: Dict[int, int] = {
+            int(item.channel_id): int(item.message_id) for item in self.repo.get_mappings()
+        }
+        # channel id -> ids of pinned messages (newest first), dropped on every pins update
+        self.pins: Dict[int, List[int]] = {}
+
+    async def get_pins(self, channel: disnake.TextChannel) -> List[int]:
+        if channel.id not in self.pins:
+            self.pins[channel.id] = [message.id for message in await channel.pins()]
+        return self.pins[channel.id]
+
+    def remove_mapping(self, channel_id: int):
+        self.pin_map.pop(channel_id, None)
+        self.repo.remove_channel(str(channel_id))
+
     @commands.check(utils.helper_plus)
     @commands.group(pass_context=True)
     async def pin(self, ctx: commands.Context):
@@ -36,6 +56,7 @@ class AutoPin(commands.Cog):
             message: disnake.Message = await converter.convert(ctx, message_url)
 
             self.repo.add_or_update_channel(str(message.channel.id), str(message.id))
+            self.pin_map[message.channel.id] = message.id
 
             if not message.pinned:
                 await message.pin()
@@ -50,60 +71,86 @@ class AutoPin(commands.Cog):
         if channel is None:
             channel = ctx.channel
 
-        if self.repo.find_channel_by_id(str(channel.id)) is None:
+        if channel.id not in self.pin_map:
             await ctx.send(utils.fill_message("autopin_remove_not_exists", channel_name=channel.name))
             return
 
-        self.repo.remove_channel(str(channel.id))
+        self.remove_mapping(channel.id)
         await ctx.send(Messages.autopin_remove_done)
 
+    async def resolve_mapping(
+        self, channel_id: int, message_id: int, semaphore: asyncio.Semaphore
+    ) -> Tuple[str, bool]:
+        """Returns list line of the mapping and whether the mapping is dead (channel or message was deleted).
+        Mappings which can't be checked because of missing permissions are not dead.
+        """
+        async with semaphore:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.bot.fetch_channel(channel_id)
+                except (disnake.NotFound, disnake.Forbidden) as e:
+                    line = utils.fill_message("autopin_list_unknown_channel", channel_id=channel_id)
+                    return line, isinstance(e, disnake.NotFound)
+
+            if message_id not in self.pins.get(channel_id, []):
+                # Pinned message is known to exist, others have to be checked
+                try:
+                    await channel.fetch_message(message_id)
+                except (disnake.NotFound, disnake.Forbidden) as e:
+                    line = utils.fill_message("autopin_list_unknown_message", channel=channel.mention)
+                    return line, isinstance(e, disnake.NotFound)
+
+        jump_url = channel.get_partial_message(message_id).jump_url
+        return utils.fill_message("autopin_list_item", channel=channel.mention, url=jump_url), False
+
     @pin.command(aliases=["list"], brief=Messages.autopin_list_brief)
     async def get_list(self, ctx: commands.Context):
-        mappings: List[PinMap] = self.repo.get_mappings()
-
-        if len(mappings) == 0:
+        if len(self.pin_map) == 0:
             await ctx.send(Messages.autopin_no_messages)
             return
 
-        lines: List[str] = []
-        for item in mappings:
-            channel: disnake.TextChannel = await self.bot.fetch_channel(int(item.channel_id))
-
-            if channel is None:
-                lines.append(utils.fill_message("autopin_list_unknown_channel", channel_id=item.channel_id))
-            else:
-                message: disnake.Message = await channel.fetch_message(int(item.message_id))
-                if message is None:
-                    msg: str = utils.fill_message("autopin_list_unknown_message", channel=channel.mention)
-                    lines.append(msg)
-                else:
-                    jump_url: str = message.jump_url
-                    msg: str = utils.fill_message("autopin_list_item", channel=channel.mention, url=jump_url)
-                    lines.append(msg)
-
-        for part in utils.split_to_parts(lines, 10):
-            await ctx.send("\n".join(part))
+        semaphore = asyncio.Semaphore(LIST_CONCURRENCY)
+        mappings = list(self.pin_map.items())
+        results = await asyncio.gather(*[
+            self.resolve_mapping(channel_id, message_id, semaphore)
+            for channel_id, message_id in mappings
+        ])
+
+        # deleted channels and messages are pruned with one query, unless the mapping changed meanwhile
+        dead = [
+            channel_id for (channel_id, message_id), (_, is_dead) in zip(mappings, results)
+            if is_dead and self.pin_map.get(channel_id) == message_id
+        ]
+        if dead:
+            self.repo.remove_channels([str(channel_id) for channel_id in dead])
+            for channel_id in dead:
+                self.pin_map.pop(channel_id, None)
+
+        await send_list_of_messages(ctx.channel, [line for line, _ in results])
 
     @commands.Cog.listener()
     async def on_guild_channel_pins_update(self, channel: disnake.TextChannel, last_pin):
-        pin_map: PinMap = self.repo.find_channel_by_id(str(channel.id))
+        # Pin or unpin happened, cached pins are outdated
+        self.pins.pop(channel.id, None)
 
-        if pin_map is None:
+        if channel.id not in self.pin_map:
             # This channel is not used to check pins.
             return
+        mapped_id = self.pin_map[channel.id]
 
-        pins: List[disnake.Message] = await channel.pins()
+        pins = await self.get_pins(channel)
 
-        if not any(x.id == int(pin_map.message_id) for x in pins):
+        if mapped_id not in pins:
             # Mapped pin was removed. Remove from map.
-            self.repo.remove_channel(str(channel.id))
+            self.remove_mapping(channel.id)
             print(f"INFO:\tRemoved {channel.id} from PIN mapping. (on_guild_channel_pins_update)")
-        elif pins[0].id != int(pin_map.message_id):
-            message: disnake.Message = await channel.fetch_message(int(pin_map.message_id))
-
-            if message is None:
+        elif pins[0] != mapped_id:
+            try:
+                message: disnake.Message = await channel.fetch_message(mapped_id)
+            except disnake.NotFound:
                 # Message not exists. Remove from map.
-                self.repo.remove_channel(str(channel.id))
+                self.remove_mapping(channel.id)
                 return
 
             await message.unpin()
@@ -112,13 +159,15 @@ class AutoPin(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_message_delete(self, payload: disnake.RawMessageDeleteEvent):
-        pin_map: PinMap = self.repo.find_channel_by_id(str(payload.channel_id))
+        pins = self.pins.get(payload.channel_id)
+        if pins is not None and payload.message_id in pins:
+            pins.remove(payload.message_id)
 
-        if pin_map is None or pin_map.message_id != str(payload.message_id):
+        if self.pin_map.get(payload.channel_id) != payload.message_id:
             return
 
-        self.repo.remove_channel(str(payload.channel_id))
-        print(f"INFO:\tRemoved {pin_map.channel_id} from PIN mapping. (on_raw_message_delete)")
+        self.remove_mapping(payload.channel_id)
+        print(f"INFO:\tRemoved {payload.channel_id} from PIN mapping. (on_raw_message_delete)")
 
     async def handle_reaction(self, ctx):
         """
@@ -137,8 +186,8 @@ class AutoPin(commands.Cog):
                 and message.type == disnake.MessageType.default
                 and message.channel.id not in config.autopin_banned_channels
             ):
-                pin_count = await channel.pins()
-                if len(pin_count) == 50:
+                pins = await self.get_pins(channel)
+                if len(pins) >= 50:
                     now = datetime.datetime.utcnow()
                     if self.warning_time + datetime.timedelta(minutes=config.autopin_warning_cooldown) < now:
                         await channel.send(
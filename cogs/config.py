@@ -6,8 +6,9 @@ import toml
 from datetime import datetime
 
 import utils
-from config.app_config import config, load_config
+from config.app_config import config
 from config.messages import Messages
+from features.config_watcher import config_watcher
 
 
 class DynamicConfig(commands.Cog):
@@ -31,7 +32,7 @@ class DynamicConfig(commands.Cog):
         if key is None or not value:
             await ctx.send(utils.get_command_signature(ctx))
             return
-        load_config()
+        await config_watcher.reload()
         await self.change_value(ctx, key, list(value), False)
 
     @config.command(brief=Messages.config_append_brief)
@@ -43,7 +44,7 @@ class DynamicConfig(commands.Cog):
         if key is None or not value:
             await ctx.send(Messages.config_append_format)
             return
-        load_config()
+        await config_watcher.reload()
         await self.change_value(ctx, key, list(value), True)
 
     @config.command(brief=Messages.config_load_brief)
@@ -51,7 +52,7 @@ class DynamicConfig(commands.Cog):
         """
         Load config from `config.toml`
         """
-        load_config()
+        await config_watcher.reload()
         await ctx.send(Messages.config_loaded)
 
     @config.command(name="list", brief=Messages.config_list_brief)
@@ -112,7 +113,7 @@ class DynamicConfig(commands.Cog):
                 config.toml_dict[section] = template[section]
         with open(config_path, "w+", encoding="utf-8") as fd:
             toml.dump(config.toml_dict, fd)
-        load_config()
+        await config_watcher.reload()
         await ctx.send(Messages.config_synced)
 
     async def change_value(self, ctx, key: str, value: list, append: bool):
@@ -163,9 +164,10 @@ class DynamicConfig(commands.Cog):
         else:
             await ctx.send(Messages.config_wrong_key)
             return
-        setattr(config, key, value)
         with open(config_path, "w+", encoding="utf-8") as fd:
             toml.dump(config.toml_dict, fd)
+        # apply the value the same way as it will be loaded next time and notify subscribers
+        await config_watcher.reload()
         await ctx.send(Messages.config_updated)
 
     @config.error
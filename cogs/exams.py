@@ -1,11 +1,9 @@
 import disnake
-from disnake.ext import commands, tasks
+from disnake.ext import commands
 import datetime
 from typing import Union, List, Optional
 import re
 import requests
-from bs4 import BeautifulSoup
-from bs4.element import NavigableString
 import math
 import collections
 
@@ -13,6 +11,7 @@ from buttons.embed import EmbedView
 from config.app_config import config
 from config import cooldowns
 from config.messages import Messages
+from features.scheduler import scheduler
 from repository.exams_repo import ExamsTermsMessageRepo
 import utils
 
@@ -22,28 +21,40 @@ CLEANR = re.compile("<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});")
 DATE_OFFSET = 14
 TIME_OFFSET = 14
 
+UPDATE_TERMS_JOB = "exams_update_terms"
+
 
 class Exams(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-        self.subscribed_guilds: List[int] = []
-        if config.exams_subscribe_default_guild:
-            self.subscribed_guilds.append(config.guild_id)
-
         self.exams_repo = ExamsTermsMessageRepo()
 
-        if self.subscribed_guilds:
-            self.update_terms_task.start()
+        scheduler.register(UPDATE_TERMS_JOB, self.update_terms_task)
+        if config.exams_subscribe_default_guild and config.guild_id not in self.subscribed_guilds:
+            self.schedule_update_terms(self.subscribed_guilds + [config.guild_id])
 
     def cog_unload(self):
-        if self.update_terms_task.is_running():
-            self.update_terms_task.cancel()
-        self.subscribed_guilds = []
-
-    def __del__(self):
-        if self.update_terms_task.is_running():
-            self.update_terms_task.cancel()
+        scheduler.unregister(UPDATE_TERMS_JOB)
+
+    @property
+    def subscribed_guilds(self) -> List[int]:
+        job = scheduler.get(UPDATE_TERMS_JOB)
+        return list(job.args["guild_ids"]) if job is not None else []
+
+    def schedule_update_terms(self, guild_ids: List[int], when: Optional[datetime.datetime] = None):
+        """Periodic update of terms in subscribed guilds, the list of guilds is stored with the job."""
+        if not guild_ids:
+            scheduler.cancel(UPDATE_TERMS_JOB)
+            return
+        scheduler.schedule(
+            UPDATE_TERMS_JOB,
+            UPDATE_TERMS_JOB,
+            when,
+            {"guild_ids": guild_ids},
+            interval=int(config.exams_terms_update_interval * 24 * 3600),
+            jitter=config.scheduler_jitter_seconds,
+        )
 
     @cooldowns.default_cooldown
     @commands.check(utils.helper_plus)
@@ -96,12 +107,15 @@ class Exams(commands.Cog):
     @commands.check(utils.is_bot_admin)
     @commands.command(brief=Messages.exams_start_terms_brief)
     async def start_terms(self, ctx: commands.Context):
-        if ctx.guild.id not in self.subscribed_guilds:
-            self.subscribed_guilds.append(ctx.guild.id)
+        job = scheduler.get(UPDATE_TERMS_JOB)
+        guild_ids = self.subscribed_guilds
+        if ctx.guild.id not in guild_ids:
+            guild_ids.append(ctx.guild.id)
 
-        if not self.update_terms_task.is_running():
-            self.update_terms_task.start()
+        if job is None:
+            self.schedule_update_terms(guild_ids)
         else:
+            self.schedule_update_terms(guild_ids, job.next_run)
             # If task is already running update terms now
             await self.update_exam_terms(ctx.guild)
 
@@ -110,18 +124,19 @@ class Exams(commands.Cog):
     @commands.check(utils.is_bot_admin)
     @commands.command(brief=Messages.exams_stop_terms_brief)
     async def stop_terms(self, ctx: commands.Context):
-        if ctx.guild in self.subscribed_guilds:
-            self.subscribed_guilds.remove(ctx.guild.id)
+        job = scheduler.get(UPDATE_TERMS_JOB)
+        guild_ids = self.subscribed_guilds
+        if ctx.guild.id in guild_ids:
+            guild_ids.remove(ctx.guild.id)
 
         # If there are no subscribed guilds terminate whole task
-        if not self.subscribed_guilds:
-            self.update_terms_task.cancel()
+        if job is not None:
+            self.schedule_update_terms(guild_ids, job.next_run)
 
         await ctx.send(utils.fill_message("exams_automatic_update_stopped", guild_name=ctx.guild.name))
 
-    @tasks.loop(hours=int(config.exams_terms_update_interval * 24))
-    async def update_terms_task(self):
-        for guild in self.subscribed_guilds:
+    async def update_terms_task(self, guild_ids: List[int]):
+        for guild in guild_ids:
             guild = disnake.utils.get(self.bot.guilds, id=guild)
             if guild is not None:
                 await self.update_exam_terms(guild)
@@ -222,6 +237,9 @@ class Exams(commands.Cog):
         year: Union[str, None],
         author: Optional[disnake.User] = None,
     ):
+        from bs4 import BeautifulSoup
+        from bs4.element import NavigableString
+
         date = datetime.date.today()
 
         semester = "ZS"
@@ -1,8 +1,6 @@
 import disnake
 from disnake.ext import commands
 import requests
-from bs4 import BeautifulSoup
-from cairosvg import svg2png
 from io import BytesIO
 import utils
 from config import cooldowns
@@ -19,6 +17,9 @@ class FitRoom(commands.Cog):
     @cooldowns.default_cooldown
     @commands.command(brief=Messages.fit_room_brief, description=Messages.fit_room_help)
     async def room(self, ctx: commands.Context, *, room: str):
+        from bs4 import BeautifulSoup
+        from cairosvg import svg2png
+
         url = f"https://www.fit.vut.cz/fit/map/.cs?show={room.upper()}&big=1"
         r = requests.get(url)
         if r.status_code != 200:
@@ -1,4 +1,6 @@
 import copy
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
 import disnake
 from disnake.ext import commands
 from buttons.embed import EmbedView
@@ -10,12 +12,47 @@ from features.git import Git
 import utils
 
 
+Check = Callable[[commands.Context], bool]
+
+
+def passes(check: Check, ctx: commands.Context) -> bool:
+    try:
+        return bool(check(ctx))
+    except Exception:
+        return False
+
+
 class Help(commands.Cog):
     """Help command"""
 
     def __init__(self, bot):
         self.bot = bot
         self.git = Git()
+        # commands of every cog with all checks required to show them, built once per loaded extensions
+        self.registry: Optional[List[Tuple[str, str, List[Tuple[Tuple[Check, ...], dict]]]]] = None
+        self.checks: List[Check] = []
+        # pages by permission profile, i.e. the set of checks the user passes
+        self.pages: Dict[FrozenSet[Check], List[dict]] = {}
+
+    @commands.Cog.listener()
+    async def on_extensions_changed(self):
+        self.registry = None
+        self.checks = []
+        self.pages = {}
+
+    def build_registry(self):
+        """Walk commands of all cogs once and remember which checks each help entry requires"""
+        self.registry = []
+        checks = {}
+        for name, cog in self.bot.cogs.items():
+            entries = []
+            for command in cog.walk_commands():
+                for required, details in self.command_entries(command):
+                    required = tuple(command.checks) + required
+                    entries.append((required, details))
+                    checks.update(dict.fromkeys(required))
+            self.registry.append((name, cog.description, entries))
+        self.checks = list(checks)
 
     def command_details(self, prefix: str, command: commands.Command):
         return {
@@ -25,50 +62,52 @@ class Help(commands.Cog):
             "aliases": command.aliases,
         }
 
-    def command_help(self, ctx: commands.Context, command: commands.Command):
-        """Generate help for commands and subcommands"""
-        current_page = list()
+    def command_entries(self, command: commands.Command) -> List[Tuple[Tuple[Check, ...], dict]]:
+        """Help entries of command and its subcommands with checks of the subcommands"""
+        entries = list()
         prefix = config.default_prefix
         if type(command) == commands.Group:
             # group command without invoked subcommand is separate command
             # e.g. karma, reviews
             if command.usage is not None:
-                current_page.append(self.command_details(prefix, command))
+                entries.append(((), self.command_details(prefix, command)))
             key_prefix = f"{prefix}{command.name} "
             for subcommand in command.commands:
-                for check in subcommand.checks:
-                    try:
-                        if not check(ctx):
-                            break
-                    except Exception:
-                        break
-                else:
-                    current_page.append(self.command_details(key_prefix, subcommand))
+                entries.append((tuple(subcommand.checks), self.command_details(key_prefix, subcommand)))
         elif not command.parent:
-            current_page.append(self.command_details(prefix, command))
-        return current_page
+            entries.append(((), self.command_details(prefix, command)))
+        return entries
+
+    def command_help(self, ctx: commands.Context, command: commands.Command):
+        """Generate help for commands and subcommands"""
+        return [
+            details for required, details in self.command_entries(command)
+            if all(passes(check, ctx) for check in required)
+        ]
 
     def generate_pages(self, ctx: commands.Context):
-        """Generate pages for help. Page per cog. Including subcommands and applying commands checks"""
+        """Generate pages for help. Page per cog. Including subcommands and applying commands checks.
+        Pages are cached for every combination of passed checks (e.g. admin, helper+, regular user).
+        """
+        if self.registry is None:
+            self.build_registry()
+        profile = frozenset(check for check in self.checks if passes(check, ctx))
+        if profile in self.pages:
+            return self.pages[profile]
+
         pages = list()
-        for name, cog in self.bot.cogs.items():
-            current_page = list()
-            for command in cog.walk_commands():
-                for check in command.checks:
-                    try:
-                        if not check(ctx):
-                            break
-                    except Exception:
-                        break
-                else:
-                    current_page += self.command_help(ctx, command)
+        for name, description, entries in self.registry:
+            current_page = [
+                details for required, details in entries
+                if all(check in profile for check in required)
+            ]
             if current_page:
                 pages.append({
                     "commands": current_page,
-                    "description": cog.description,
+                    "description": description,
                     "groupName": name
                 })
-
+        self.pages[profile] = pages
         return pages
 
     def generate_embed(self, page):
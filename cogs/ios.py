@@ -1,132 +1,75 @@
 import disnake
-from disnake.ext import commands, tasks
+from disnake.ext import commands
 from config import cooldowns
 from config.app_config import config
-from repository.database import session
-from repository.database.verification import Permit, Valid_person
+from repository.user_repo import UserRepository
 from features.list_message_sender import send_list_of_messages
+from features import ios_parser
+from features.scheduler import scheduler
+from typing import Dict, Iterable, Optional
 import utils
 import subprocess
 import datetime
-import re
 
+user_r = UserRepository()
 
-def running_for(time):
-    now = datetime.datetime.now()
-    time = time.split(':')
-    if len(time) == 2:
-        hours = now.hour - int(time[0])
-        minutes = now.minute - int(time[1])
-        return hours * 60 + minutes
-    else:
-        date = datetime.datetime.strptime(time[0], "%b%d")
-        minutes = (now - date.replace(year=now.year)).total_seconds() // 60
-        # subtracting a day as to assume it was ran right before midnight
-        return minutes - 1440
+IOS_JOB = "ios_report"
+
+
+class LoginResolver:
+    """Resolves logins to their year and discord ID in bulk.
+
+    All logins of a report are fetched with one query per table and the results
+    are kept for `ios_login_cache_minutes`, so consecutive runs of the loop
+    don't look up the same logins again. Logins without discord ID are looked up
+    again in every run, the user can verify in the meantime.
+    """
+
+    def __init__(self):
+        self.years: Dict[str, Optional[str]] = {}
+        self.discord_ids: Dict[str, Optional[str]] = {}
+        self.resolved_at: Dict[str, datetime.datetime] = {}
+
+    def resolve(self, logins: Iterable[str]):
+        now = datetime.datetime.now()
+        max_age = datetime.timedelta(minutes=config.ios_login_cache_minutes)
+
+        # forget expired logins and misses of the previous run so the cache doesn't grow forever
+        for login in list(self.years):
+            resolved_at = self.resolved_at.get(login)
+            if resolved_at is None or now - resolved_at > max_age:
+                del self.years[login], self.discord_ids[login]
+                self.resolved_at.pop(login, None)
 
+        missing = [login for login in set(logins) if login not in self.resolved_at]
+        if not missing:
+            return
 
-def unchanged_for(date, format_str):
-    now = datetime.datetime.now()
-    date = datetime.datetime.strptime(date, format_str)
-    return (now - date.replace(year=now.year)).total_seconds() // 60
+        years = user_r.get_years_by_logins(missing)
+        discord_ids = user_r.get_discord_ids_by_logins(missing)
+        for login in missing:
+            self.years[login] = years.get(login)
+            self.discord_ids[login] = discord_ids.get(login)
+            if self.discord_ids[login] is not None:
+                self.resolved_at[login] = now
 
 
 # filter people and keep only those containing "BIT" or "FEKT" in person.year
-def filter_year(resources):
-    # get unique logins and people objects from db
+def filter_year(resources, resolver: LoginResolver):
+    # get unique logins and resolve them all at once
     logins = set(login for res_data in resources.values() for login in res_data.keys())
-    people = {
-        login: session.query(Valid_person).filter(Valid_person.login == login).one_or_none()
-        for login in logins
-    }
+    resolver.resolve(logins)
 
     # keep only people with "BIT" or "FEKT" in their person.year
     out_res = {res_type: {} for res_type in resources.keys()}
     for res_type, res_data in resources.items():
         for login, data in res_data.items():
-            if not people.get(login) or "BIT" in people[login].year or "FEKT" in people[login].year:
+            year = resolver.years.get(login)
+            if year is None or "BIT" in year or "FEKT" in year:
                 out_res[res_type][login] = data
     return out_res
 
 
-def parse_memory(memory):
-    parsed = {}
-    for line in memory.strip().splitlines():
-        line = line.split()
-        login = line[1]
-        if not login.startswith('x'):
-            continue
-        last_change = " ".join(line[-3:])
-        since_last_change = unchanged_for(last_change, '%b %d %H:%M:%S')
-        if since_last_change > 10:
-            if login not in parsed:
-                parsed[login] = list()
-            parsed[login].append(since_last_change)
-    return parsed
-
-
-def parse_semaphores(semaphores):
-    parsed = {}
-    parsed_files = {}
-    if "soubory semaforu" in semaphores:
-        semaphores, files = semaphores.split("soubory semaforu:\n")
-    else:
-        files = ""
-
-    for line in semaphores.strip().splitlines():
-        line = line.split()
-        login = line[1]
-        if not login.startswith('x'):
-            continue
-        last_change = " ".join(line[-4:-1])
-        since_last_change = unchanged_for(last_change, '%b %d %H:%M:%S')
-        if since_last_change > 10:
-            if login not in parsed:
-                parsed[login] = list()
-            parsed[login].append(since_last_change)
-
-    for line in files.strip().splitlines():
-        line = line.split()
-        login = line[2]
-        if not login.startswith('x'):
-            continue
-        last_change = " ".join(line[5:7])
-        name = line[7]
-        since_last_change = unchanged_for(last_change, "%m-%d %H:%M")
-        if since_last_change > 10 or login not in name:
-            if login not in parsed_files:
-                parsed_files[login] = [list(), False]
-            parsed_files[login][0].append(since_last_change)
-            if login not in name:
-                parsed_files[login][1] = True
-
-    return parsed, parsed_files
-
-
-def parse_processes(processes):
-    parsed = {}
-    for line in processes.strip().splitlines():
-        line = line.split()
-        login = line[0]
-        if not login.startswith('x'):
-            continue
-        time = line[8]
-        uptime = running_for(time)
-        if uptime > 10:
-            if login not in parsed:
-                parsed[login] = list()
-            parsed[login].append(uptime)
-    return parsed
-
-
-def filter_processes(processes):
-    out = []
-    for line in processes.strip().splitlines():
-        if re.search(r"/[a-zA-Z0-9.]+ \d+ \d+ \d+ \d+ \d+$", line):
-            out.append(line)
-    return "\n".join(out)
-
-
 def format_time(minutes):
     hours = minutes / 60
     days = hours / 24
@@ -162,20 +105,20 @@ _inflected_resources = {
 }
 
 
-def insult_login(parsed_items, system, res_type):
+def insult_login(parsed_items, system, res_type, resolver: LoginResolver):
     output_array = []
-    for login, array in parsed_items.items():
-        user = session.query(Permit).filter(Permit.login == login).one_or_none()
+    for login, usage in parsed_items.items():
+        discord_id = resolver.discord_ids.get(login)
 
-        if not user:
+        if not discord_id:
             msg = f"Na {system} leží {_inflected_resources[res_type][0]}" \
                 f"nějakého `{login}` co není na serveru."
         else:
-            count = len(array)
-            avg_time = int(sum(array) // count)
+            count = usage.count
+            avg_time = int(usage.average)
 
             msg = (
-                f"{utils.generate_mention(user.discord_ID)} máš na"
+                f"{utils.generate_mention(discord_id)} máš na"
                 f"{system} `{count}` {_inflected_resources[res_type][1]}, "
                 f"{_inflected_resources[res_type][2]} průměrně `{format_time(avg_time)}`, ty prase."
             )
@@ -183,36 +126,32 @@ def insult_login(parsed_items, system, res_type):
     return output_array
 
 
-def insult_login_shm(parsed_files, system):
+def insult_login_shm(parsed_files, system, resolver: LoginResolver):
     output_array = []
-    for login, data in parsed_files.items():
-        user = session.query(Permit).filter(Permit.login == login).one_or_none()
-        array, login_not_in_name = data
+    for login, usage in parsed_files.items():
+        discord_id = resolver.discord_ids.get(login)
 
-        if not user:
+        if not discord_id:
             msg = f"Na {system} leží soubory semaforů nějakého `{login}` co není na serveru."
         else:
-            count = len(array)
-            avg_time = float(sum(array)) // count
-
             msg = (
-                f"{utils.generate_mention(user.discord_ID)} "
-                f"máš na {system}(`/dev/shm`) `{count}` souborů semaforů.")
-            if avg_time > 9:
-                msg += f"\n\t\tLeží ti tam průměrně už `{format_time(avg_time)}`, ty prase."
-            if login_not_in_name:
+                f"{utils.generate_mention(discord_id)} "
+                f"máš na {system}(`/dev/shm`) `{usage.count}` souborů semaforů.")
+            if usage.average > 9:
+                msg += f"\n\t\tLeží ti tam průměrně už `{format_time(int(usage.average))}`, ty prase."
+            if usage.login_not_in_name:
                 msg += "\n\t\tNemáš v názvu tvůj login, takže můžeš mit kolize s ostatními, ty prase."
         output_array += [msg]
     return output_array
 
 
-async def print_output(bot, channel, system, resources):
+async def print_output(bot, channel, system, resources, resolver: LoginResolver):
     out_arr = []
     for res_type in [RESOURCE_TYPE.MEMORY, RESOURCE_TYPE.SEMAPHORE, RESOURCE_TYPE.PROCESS]:
         if resources.get(res_type):
-            out_arr += insult_login(resources[res_type], system, res_type)
+            out_arr += insult_login(resources[res_type], system, res_type, resolver)
     if (shm_resources := resources.get(RESOURCE_TYPE.FILE)):
-        out_arr += insult_login_shm(shm_resources, system)
+        out_arr += insult_login_shm(shm_resources, system, resolver)
 
     if not any(resources.values()):
         await channel.send(f"Na {system} uklizeno <:HYPERS:493154327318233088>")
@@ -223,6 +162,11 @@ async def print_output(bot, channel, system, resources):
 class IOS(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.login_resolver = LoginResolver()
+        scheduler.register(IOS_JOB, self.ios_task)
+
+    def cog_unload(self):
+        scheduler.unregister(IOS_JOB)
 
     @cooldowns.default_cooldown
     @commands.check(utils.helper_plus)
@@ -233,56 +177,70 @@ class IOS(commands.Cog):
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def ios_start(self, ctx):
-        self.ios_body.start(ctx.channel)
+        scheduler.schedule(
+            IOS_JOB,
+            IOS_JOB,
+            args={"channel_id": ctx.channel.id},
+            interval=config.ios_looptime_minutes * 60,
+            jitter=config.scheduler_jitter_seconds,
+        )
 
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def ios_stop(self, ctx):
-        self.ios_body.stop()
+        scheduler.cancel(IOS_JOB)
 
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def ios_cancel(self, ctx):
-        self.ios_body.cancel()
+        scheduler.cancel(IOS_JOB)
+
+    async def ios_task(self, channel_id: int):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            channel = await self.bot.fetch_channel(channel_id)
+        await self.ios_body(channel)
 
-    @tasks.loop(minutes=config.ios_looptime_minutes)
     async def ios_body(self, channel=disnake.Object(id='534431057001316362')):
         process = subprocess.Popen(["ssh", "merlin"], stdout=subprocess.PIPE)
         output, _ = process.communicate()
-        memory, rest = output.decode('utf-8').split("semafory:\n")
-        semaphores, processes = rest.split("procesy:\n")
         try:
-            parsed_memory = parse_memory(memory)
-            parsed_semaphores, parsed_files = parse_semaphores(semaphores)
-            parsed_processes = parse_processes(processes)
+            memory, rest = output.decode('utf-8').split("semafory:\n")
+            semaphores, processes = rest.split("procesy:\n")
+            parsed_memory = ios_parser.parse_memory(memory)
+            parsed_semaphores, parsed_files = ios_parser.parse_semaphores(semaphores)
+            parsed_processes = ios_parser.parse_processes(processes)
             parsed_resources = {
                 RESOURCE_TYPE.MEMORY:    parsed_memory,
                 RESOURCE_TYPE.SEMAPHORE: parsed_semaphores,
                 RESOURCE_TYPE.FILE:      parsed_files,
                 RESOURCE_TYPE.PROCESS:   parsed_processes,
             }
-            await print_output(self.bot, channel, "merlinovi", filter_year(parsed_resources))
-        except IndexError:
+            resources = filter_year(parsed_resources, self.login_resolver)
+            await print_output(self.bot, channel, "merlinovi", resources, self.login_resolver)
+        except ValueError:
+            # output sections are missing, malformed lines are skipped by the parsers
             await channel.send("Toastere, máš bordel v parsování.")
 
         process = subprocess.Popen(["ssh", "eva"], stdout=subprocess.PIPE)
         output, _ = process.communicate()
-
-        memory, rest = output.decode('utf-8').split("semafory:\n")
-        semaphores, processes = rest.split("procesy:\n")
-        # remove unwanted processes
-        processes = filter_processes(processes)
         try:
-            parsed_memory = parse_memory(memory)
-            parsed_semaphores, _ = parse_semaphores(semaphores)
-            parsed_processes = parse_processes(processes)
+            memory, rest = output.decode('utf-8').split("semafory:\n")
+            semaphores, processes = rest.split("procesy:\n")
+            # remove unwanted processes
+            processes = ios_parser.filter_processes(processes)
+            parsed_memory = ios_parser.parse_memory(memory)
+            parsed_semaphores, _ = ios_parser.parse_semaphores(semaphores)
+            parsed_processes = ios_parser.parse_processes(processes)
             parsed_resources = {
                 RESOURCE_TYPE.MEMORY:    parsed_memory,
                 RESOURCE_TYPE.SEMAPHORE: parsed_semaphores,
                 RESOURCE_TYPE.PROCESS:   parsed_processes,
             }
-            await print_output(self.bot, channel, "evě", filter_year(parsed_resources))
-        except IndexError:
+            resources = filter_year(parsed_resources, self.login_resolver)
+            await print_output(self.bot, channel, "evě", resources, self.login_resolver)
+        except ValueError:
+            # output sections are missing, malformed lines are skipped by the parsers
             await channel.send("Toastere, máš bordel v parsování.")
         # eva doesn't seem to have /dev/shm
         await channel.send("Pokud nevíte jak po sobě uklidit, checkněte: " +
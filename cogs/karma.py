@@ -8,6 +8,7 @@ from config.app_config import config
 from config import messages, cooldowns
 from features import karma
 from features.leaderboard import LeaderboardPageSource
+from features.scheduler import scheduler
 from repository import karma_repo
 from cogs import room_check
 from features.reaction_context import ReactionContext
@@ -26,6 +27,10 @@ class Karma(commands.Cog):
         self._leaderboard_formatter = utils.make_pts_column_row_formatter(Database_karma.karma.name)
         self._positive_formatter = utils.make_pts_column_row_formatter(Database_karma.positive.name)
         self._negative_formatter = utils.make_pts_column_row_formatter(Database_karma.negative.name)
+        scheduler.register("karma_emoji_vote", self.karma.emoji_finish_vote)
+
+    def cog_unload(self):
+        scheduler.unregister("karma_emoji_vote")
 
     async def handle_reaction(self, ctx: ReactionContext):
         # grillbot emoji for removing message causes errors
@@ -1,9 +1,8 @@
 import datetime
 from io import BytesIO
-from PIL import Image, ImageDraw
 from random import choice
 import requests
-from typing import List
+from typing import TYPE_CHECKING, List
 
 import disnake
 from disnake.ext import commands
@@ -13,6 +12,9 @@ from config.app_config import config
 from config.messages import Messages
 from config import cooldowns
 
+if TYPE_CHECKING:
+    from PIL import Image
+
 uhoh_counter = 0
 storno_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=config.storno_delay)
 storno_images = ["storno.png", "storno_lgtm.png"]
@@ -69,6 +71,8 @@ class Meme(commands.Cog):
         """Bonk someone
         member: disnake user. If none, the bot will bonk you.
         """
+        from PIL import Image
+
         if member is None:
             bonked = ctx.author
         else:
@@ -105,8 +109,10 @@ class Meme(commands.Cog):
                     mention_author=False,
                 )
 
-    def get_bonk_frames(self, avatar: Image.Image) -> List[Image.Image]:
+    def get_bonk_frames(self, avatar: "Image.Image") -> List["Image.Image"]:
         """Get frames for the bonk"""
+        from PIL import Image
+
         frames = []
         width, height = 200, 170
         deformation = (0, 0, 0, 5, 10, 20, 15, 5)
@@ -127,8 +133,10 @@ class Meme(commands.Cog):
         return frames
 
     @staticmethod
-    def round_image(frame_avatar: Image.Image) -> Image.Image:
+    def round_image(frame_avatar: "Image.Image") -> "Image.Image":
         """Convert square avatar to circle"""
+        from PIL import Image, ImageDraw
+
         frame_mask = Image.new("1", frame_avatar.size, 0)
         draw = ImageDraw.Draw(frame_mask)
         draw.ellipse((0, 0) + frame_avatar.size, fill=255)
@@ -1,10 +1,11 @@
 import disnake
 from disnake.ext import commands
+from features.attachment_spool import SpoolReport, close_files, download_attachments
 from features.reaction_context import ReactionContext
 from config.app_config import config
 from repository.karma_repo import KarmaRepository
 from repository.meme_repost_repo import MemeRepostRepo
-from typing import List, Union
+from typing import Dict, List, Optional, Set, Union
 import utils
 import asyncio
 
@@ -19,28 +20,45 @@ class MemeRepost(commands.Cog):
 
         self.repost_lock = asyncio.Lock()
 
+        # ids of reposted original messages and author ids by ids of repost messages
+        self.reposted_originals: Set[int] = set()
+        self.repost_authors: Dict[int, int] = {}
+        for repost in self.repost_repo.get_all():
+            self.remember_repost(repost.original_message_id, repost.author_id,
+                                 repost.reposted_message_id, repost.secondary_repost_message_id)
+
+    def remember_repost(self, original_message_id, author_id, repost_message_id, secondary_message_id=None):
+        self.reposted_originals.add(int(original_message_id))
+        for message_id in (repost_message_id, secondary_message_id):
+            # ids are stored as strings, missing messages as "-1" or "None"
+            if message_id is not None and str(message_id).isdigit():
+                self.repost_authors[int(message_id)] = int(author_id)
+
+    def get_repost_author(self, message_id: int) -> Optional[int]:
+        return self.repost_authors.get(message_id)
+
     async def handle_reaction(self, ctx: ReactionContext):
         if ctx.channel.id == config.meme_room:
-            if self.repost_repo.find_repost_by_original_message_id(ctx.message.id) is not None:
+            if ctx.message.id in self.reposted_originals:
                 # Message was reposted before
                 return
 
             all_reactions: List[disnake.Reaction] = ctx.message.reactions
+            emoji_values = self.karma_repo.get_emoji_values()
             for reac in all_reactions:
                 if reac.count >= config.repost_threshold:
-                    emoji_key = str(reac.emoji.id) if type(reac.emoji) != str else reac.emoji
-                    emoji_val = self.karma_repo.emoji_value(emoji_key)
+                    emoji_val = emoji_values.get(utils.str_emoji_id(reac.emoji), 0)
 
                     if int(emoji_val) >= 1:
                         return await self.__repost_message(ctx, all_reactions)
         elif ctx.channel.id == config.meme_repost_room:
-            repost = self.repost_repo.find_repost_by_repost_message_id(ctx.message.id)
+            author_id = self.get_repost_author(ctx.message.id)
 
-            if repost is not None:
-                if ctx.member.id == int(repost.author_id):
+            if author_id is not None:
+                if ctx.member.id == author_id:
                     return
 
-                original_post_user = ctx.guild.get_member(int(repost.author_id))
+                original_post_user = ctx.guild.get_member(author_id)
 
                 if original_post_user:
                     if isinstance(ctx.emoji, str):
@@ -50,6 +68,9 @@ class MemeRepost(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
+        if payload.channel_id != config.meme_repost_room or payload.message_id not in self.repost_authors:
+            return
+
         ctx: ReactionContext = await ReactionContext.from_payload(self.bot, payload)
         if ctx is None:
             return
@@ -57,13 +78,13 @@ class MemeRepost(commands.Cog):
         if ctx.channel.id != config.meme_repost_room:
             return
 
-        repost = self.repost_repo.find_repost_by_repost_message_id(ctx.message.id)
-        if repost is not None:
+        author_id = self.get_repost_author(ctx.message.id)
+        if author_id is not None:
 
-            if ctx.member.id == int(repost.author_id):
+            if ctx.member.id == author_id:
                 return
 
-            original_post_user = ctx.guild.get_member(int(repost.author_id))
+            original_post_user = ctx.guild.get_member(author_id)
 
             if original_post_user:
                 if isinstance(ctx.emoji, str):
@@ -81,7 +102,7 @@ class MemeRepost(commands.Cog):
             return
 
         async with self.repost_lock:
-            if self.repost_repo.find_repost_by_original_message_id(ctx.message.id) is not None:
+            if ctx.message.id in self.reposted_originals:
                 return
 
             # Generate string with all reactions on post at the time
@@ -110,18 +131,42 @@ class MemeRepost(commands.Cog):
             embed.add_field(name="Link", value=link, inline=False)
 
             # Get all attachments of original post
+            # Attachments over the upload limit of the guild are reposted as URLs
+            upload_limit = ctx.guild.filesize_limit
+            main_attachment = None
+            file_attachments = []
+            url_attachments = []
+            uploaded_size = 0
             main_image = None
-            other_attachments = []
             for attachment in ctx.message.attachments:
                 content_type = attachment.content_type
-                if content_type is not None and content_type.split("/")[0] == "image" and main_image is None:
+                is_image = content_type is not None and content_type.split("/")[0] == "image"
+                if is_image and main_attachment is None and main_image is None:
                     # Set main image if its image and main image is not set
-                    main_image = await attachment.to_file()
+                    if attachment.size <= upload_limit:
+                        main_attachment = attachment
+                    else:
+                        main_image = attachment.url
+                elif len(file_attachments) < 10 and uploaded_size + attachment.size <= upload_limit:
+                    # Other attachments are sent as files in secondary message
+                    file_attachments.append(attachment)
+                    uploaded_size += attachment.size
                 else:
-                    # Other attachments convert to file and append to list of attachments
-                    attachment_file = await attachment.to_file()
-                    if attachment_file is not None:
-                        other_attachments.append(attachment_file)
+                    url_attachments.append(attachment.url)
+
+            to_download = ([main_attachment] if main_attachment is not None else []) + file_attachments
+            report = SpoolReport()
+            spool_threshold = config.meme_repost_spool_threshold_kb * 1024
+            files = await download_attachments(to_download, spool_threshold, report)
+            other_attachments = []
+            for attachment, file in zip(to_download, files):
+                # Fall back to URL when the download failed
+                downloaded = file if file is not None else attachment.url
+                if attachment is main_attachment:
+                    main_image = downloaded
+                else:
+                    other_attachments.append(downloaded)
+            other_attachments.extend(url_attachments)
 
             # Set content from original message if present
             if ctx.message.content:
@@ -155,26 +200,34 @@ class MemeRepost(commands.Cog):
 
             repost_message_id = -1
             secondary_message_id = None
-            if len(embed) < 6000:
-                repost_message = await self.repost_channel.send(embed=embed, file=main_image)
-                repost_message_id = repost_message.id
-
-                if len(other_attachments) > 0:
-                    # Files are getting send as files
-                    files = [file for file in other_attachments if isinstance(file, disnake.File)]
-                    files = files[:10] if files else None
-
-                    # And urls as string in separated message
-                    urls = [file for file in other_attachments if isinstance(file, str)]
-                    urls = "\n".join(urls) if urls else None
-
-                    secondary_message = await self.repost_channel.send(urls, files=files)
-                    secondary_message_id = secondary_message.id
+            try:
+                if len(embed) < 6000:
+                    repost_message = await self.repost_channel.send(embed=embed, file=main_image)
+                    repost_message_id = repost_message.id
+
+                    if len(other_attachments) > 0:
+                        # Files are getting send as files
+                        attachment_files = [
+                            file for file in other_attachments if isinstance(file, disnake.File)
+                        ]
+                        attachment_files = attachment_files if attachment_files else None
+
+                        # And urls as string in separated message
+                        urls = [file for file in other_attachments if isinstance(file, str)]
+                        urls = "\n".join(urls) if urls else None
+
+                        secondary_message = await self.repost_channel.send(urls, files=attachment_files)
+                        secondary_message_id = secondary_message.id
+            finally:
+                close_files(files)
+            print(f"Meme repost of {ctx.message.id}: {len(to_download)} attachments, "
+                  f"peak memory {report.peak_memory // 1024} KiB")
 
             self.repost_repo.create_repost(ctx.message.id,
                                            repost_message_id,
                                            ctx.member.id,
                                            secondary_message_id)
+            self.remember_repost(ctx.message.id, ctx.member.id, repost_message_id, secondary_message_id)
 
 
 def setup(bot):
@@ -3,8 +3,6 @@ import disnake
 from disnake.ext import commands
 import utils
 
-from PIL import Image, ImageDraw
-
 from io import BytesIO
 import requests
 
@@ -18,6 +16,8 @@ class Pet(commands.Cog):
     @cooldowns.short_cooldown
     @commands.slash_command(name="pet", description=Messages.pet_brief)
     async def pet(self, inter: disnake.ApplicationCommandInteraction, user: disnake.User = None):
+        from PIL import Image, ImageDraw
+
         if user is None:
             user = inter.author
 
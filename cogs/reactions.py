@@ -15,6 +15,17 @@ class Reactions(commands.Cog):
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         """Catch reaction, get all properties and then call proper cog/s"""
+        vote_cog = self.bot.get_cog("Vote")
+        if vote_cog is not None and payload.message_id in vote_cog.vote_cache:
+            # votes don't need the message, skip fetching it for every reaction
+            if payload.user_id == self.bot.user.id or (payload.member is not None and payload.member.bot):
+                return
+            try:
+                await vote_cog.handle_raw_reaction_add(payload)
+            except sqlalchemy.exc.InternalError:
+                session.rollback()
+            return
+
         ctx: ReactionContext = await ReactionContext.from_payload(self.bot, payload)
         if ctx is None:
             return
@@ -2,6 +2,7 @@ import disnake
 import datetime
 from disnake.ext import commands
 import copy
+import math
 
 from config.app_config import config
 from config.messages import Messages
@@ -9,24 +10,29 @@ from config import cooldowns
 from repository import review_repo
 import utils
 from features.review import ReviewManager
+from features.subject_index import SubjectIndex
 from buttons.review import ReviewView
 from buttons.embed import EmbedView
 
 
-subjects = []
+subject_index = SubjectIndex()
 
 
 async def autocomp_subjects(inter: disnake.ApplicationCommandInteraction, user_input: str):
-    return [subject[0] for subject in subjects if user_input.lower() in subject[0]][:25]
+    return {subject_index.label(shortcut): shortcut for shortcut in subject_index.search(user_input)}
 
 
 class Review(commands.Cog):
     def __init__(self, bot):
-        global subjects
         self.bot = bot
         self.manager = ReviewManager(bot)
         self.repo = review_repo.ReviewRepository()
-        subjects = self.repo.get_all_subjects()
+        self.update_subject_index()
+
+    def update_subject_index(self):
+        """Add new subjects and names to autocomplete index and refresh popularity of subjects"""
+        subjects = [subject for subject, in self.repo.get_all_subjects()]
+        subject_index.update(subjects, self.repo.get_subject_names(), self.repo.get_review_counts())
 
     async def check_member(self, inter: disnake.ApplicationCommandInteraction):
         """Check if user is allowed to add/remove new review."""
@@ -120,26 +126,27 @@ class Review(commands.Cog):
     @subject.command(brief=Messages.subject_update_biref)
     async def update(self, ctx):
         """Updates subjects from web"""
-        global subjects
         programme_details_link = "https://www.fit.vut.cz/study/"
+        # bachelor
+        links = [(f"{programme_details_link}program/7611/.cs", False)]
+        # engineer
+        links += [(f"{programme_details_link}field/144{id}/.cs", True) for id in range(66, 82)]
+        # NISY with random ID
+        links.append((f"{programme_details_link}field/15340/.cs", True))
         async with ctx.channel.typing():
-            # bachelor
-            if not self.manager.update_subject_types(f"{programme_details_link}program/7611/.cs", False):
-                await ctx.reply(Messages.subject_update_error)
-                return
-            # engineer
-            for id in range(66, 82):
-                if not self.manager.update_subject_types(f"{programme_details_link}field/144{id}/.cs", True):
-                    await ctx.reply(Messages.subject_update_error)
-                    return
-            # NISY with random ID
-            if not self.manager.update_subject_types(f"{programme_details_link}field/15340/.cs", True):
+            # sports are updated together with programmes
+            report = await self.manager.update_subjects(links)
+            if report is None:
                 await ctx.reply(Messages.subject_update_error)
                 return
-            # sports
-            self.manager.update_sport_subjects()
-            subjects = self.repo.get_all_subjects()
-            await ctx.reply(Messages.subject_update_success)
+            self.update_subject_index()
+            await ctx.reply(utils.fill_message(
+                "subject_update_success",
+                subjects=report.subjects,
+                details=report.details,
+                updated=report.updated_details,
+                programmes=report.programmes,
+            ))
 
     @commands.slash_command(name="wtf", description=Messages.shortcut_brief)
     async def shortcut(
@@ -246,9 +253,10 @@ class Review(commands.Cog):
             embed.add_field(name="Ročník", value=year)
         utils.add_author_footer(embed, author)
 
-        pages_total = self.repo.get_tierboard_page_count(type, sem, degree, year)
+        tierboard = self.repo.get_tierboard_all(type, sem, degree, year)
+        pages_total = math.ceil(len(tierboard) / 10)
         for page in range(pages_total):
-            board = self.repo.get_tierboard(type, sem, degree, year, page*10)
+            board = tierboard[page*10:(page+1)*10]
             output = ""
             cnt = 1
             for line in board:
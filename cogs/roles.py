@@ -1,14 +1,16 @@
 import disnake
 from disnake.ext import commands
-from typing import Tuple, Union, List
+from typing import Dict, Tuple, Union, List
 
 import utils
+from features.list_message_sender import send_list_of_messages
 from config.app_config import config
 
 # TODO: use messages
 from config.messages import Messages
 from repository import role_group_repo
 from features.reaction_context import ReactionContext
+from features.permission_executor import PermissionExecutor, PermissionReport, role_permissions_for
 
 group_repo = role_group_repo.RoleGroupRepository()
 
@@ -16,6 +18,28 @@ group_repo = role_group_repo.RoleGroupRepository()
 class Roles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # message id -> {emoji: target} parsed from role message
+        self.role_mappings: Dict[int, Dict[str, Union[str, int]]] = {}
+        # group name -> (role ids, channel ids)
+        self.groups: Dict[str, Tuple[List[str], List[str]]] = {}
+        self.load_groups()
+        self.permission_executor = PermissionExecutor()
+
+    def load_groups(self):
+        """Load all role groups to memory, so reactions don't need to query DB."""
+        self.groups = {
+            group.name: (list(group.role_ids), list(group.channel_ids)) for group in group_repo.groups()
+        }
+
+    async def get_role_mapping(self, message) -> Dict[str, Union[str, int]]:
+        """Returns emoji to target mapping of role message. Parsed once per message until it's edited."""
+        mapping = self.role_mappings.get(message.id)
+        if mapping is None:
+            mapping = {}
+            for target, emoji in await self.get_join_role_data(message) or []:
+                mapping.setdefault(emoji, target)
+            self.role_mappings[message.id] = mapping
+        return mapping
 
     # Returns list of role names and emotes that represent them
     async def get_join_role_data(self, message):
@@ -88,9 +112,11 @@ class Roles(commands.Cog):
         for role in roles:
             if role is not None and role not in member.roles:
                 await member.add_roles(role)
+        changes = []
         for channel in channels:
             if channel is not None:
                 perms: disnake.PermissionOverwrite = channel.overwrites_for(member)
+                perms_for: disnake.Permissions = channel.permissions_for(member)
 
                 if not perms.is_empty():
                     deny_exp_perm = disnake.Permissions()
@@ -101,19 +127,17 @@ class Roles(commands.Cog):
                         # User have only expected permission (Allow: None, Deny: view_channel).
                         # This configuration will remove overwrite before checks and set.
                         # This will prevent from removing higher permissions from channels (or bans).
-                        await channel.set_permissions(member, overwrite=None)
+                        perms = disnake.PermissionOverwrite()
+                        perms_for = role_permissions_for(channel, member)
+                        changes.append((channel, member, None))
 
-                perms_for: disnake.Permissions = channel.permissions_for(member)
                 if perms_for.administrator or perms_for.view_channel:  # Is mod, or now have access. Ignore
                     continue
 
-                current_perms = channel.permissions_for(member)
-                if not current_perms.read_messages:
-                    if not perms.is_empty():
-                        perms.read_messages = True
-                        await channel.set_permissions(member, overwrite=perms)
-                    else:
-                        await channel.set_permissions(member, read_messages=True)
+                # replaces removal of the overwrite queued above, only one request is sent
+                perms.read_messages = True
+                changes.append((channel, member, perms))
+        await self.apply_permissions(changes)
 
     async def remove_perms(self, target, member: disnake.Member, guild):
         """Remove a target role / channel from a member."""
@@ -121,6 +145,7 @@ class Roles(commands.Cog):
         for role in roles:
             if role is not None and role in member.roles:
                 await member.remove_roles(role)
+        changes = []
         for channel in channels:
             if channel is None:
                 continue
@@ -137,25 +162,35 @@ class Roles(commands.Cog):
                 # Member have extra permissions and we don't want remove it.
                 # Instead of remove permission we set only read messages permission to deny.
                 overwrite.update(read_messages=False)
-                await channel.set_permissions(member, overwrite=overwrite)
+                changes.append((channel, member, overwrite))
                 continue
 
-            await channel.set_permissions(member, overwrite=None)
-            perms = channel.permissions_for(member)
-            if perms.read_messages:
-                # The user still sees the channel. You need to create special permissions.
-                await channel.set_permissions(member, read_messages=False)
+            if role_permissions_for(channel, member).read_messages:
+                # The user still sees the channel without overwrite. You need to create special permissions.
+                changes.append((channel, member, disnake.PermissionOverwrite(read_messages=False)))
+            else:
+                changes.append((channel, member, None))
+        await self.apply_permissions(changes)
+
+    async def apply_permissions(self, changes):
+        """Apply overwrite changes concurrently, raise first error like the serial calls did."""
+        if not changes:
+            return
+        report = await self.permission_executor.apply(changes)
+        if report.errors:
+            raise report.errors[0][2]
 
     def get_target(self, target, guild) -> Tuple[List[disnake.Role], List[disnake.abc.GuildChannel]]:
         """Detect if target is a channel a role or a group."""
         # Try a group first
-        group = group_repo.get_group(target)
+        group = self.groups.get(str(target))
         if group is not None:
+            role_ids, channel_ids = group
             roles, channels = [], []
-            for role_id in group.role_ids:
-                roles.append(disnake.utils.get(guild.roles, id=int(role_id)))
-            for channel_id in group.channel_ids:
-                channels.append(disnake.utils.get(guild.channels, id=int(channel_id)))
+            for role_id in role_ids:
+                roles.append(guild.get_role(int(role_id)))
+            for channel_id in channel_ids:
+                channels.append(guild.get_channel(int(channel_id)))
             return roles, channels
 
         # if ID
@@ -173,6 +208,7 @@ class Roles(commands.Cog):
     @commands.command()
     async def add_group(self, ctx, name: str):
         group_repo.add_group(name)
+        self.load_groups()
         await ctx.send(f"Pridal jsem groupu {name}")
 
     @commands.check(utils.is_bot_admin)
@@ -193,24 +229,28 @@ class Roles(commands.Cog):
     @commands.command()
     async def add_channel_id(self, ctx, name: str, channel_id: int):
         group_repo.group_add_channel_id(name, channel_id)
+        self.load_groups()
         await ctx.send("Done")
 
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def add_role_id(self, ctx, name: str, role_id: int):
         group_repo.group_add_role_id(name, role_id)
+        self.load_groups()
         await ctx.send("Done")
 
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def group_reset_channels(self, ctx, name: str):
         group_repo.group_reset_channels(name)
+        self.load_groups()
         await ctx.send("Done")
 
     @commands.check(utils.is_bot_admin)
     @commands.command()
     async def group_reset_roles(self, ctx, name: str):
         group_repo.group_reset_roles(name)
+        self.load_groups()
         await ctx.send("Done")
 
     @commands.check(utils.is_bot_admin)
@@ -226,9 +266,24 @@ class Roles(commands.Cog):
         Copy permissions from src channel to dst.
         Both channels are expected as tags or IDs
         """
-        for key in src.overwrites:
-            await dst.set_permissions(key, overwrite=src.overwrites[key])
-        await ctx.send(Messages.channel_copy_done)
+        overwrites = src.overwrites
+        message = await ctx.send(utils.fill_message("channel_copy_progress", done=0, total=len(overwrites)))
+
+        async def progress(report: PermissionReport):
+            await message.edit(
+                content=utils.fill_message("channel_copy_progress", done=report.done, total=report.total)
+            )
+
+        report = await self.permission_executor.apply(
+            [(dst, key, overwrite) for key, overwrite in overwrites.items()], progress
+        )
+        if report.errors:
+            errors = [f"{target}: {error}" for _, target, error in report.errors]
+            await send_list_of_messages(
+                ctx.channel, [utils.fill_message("channel_copy_failed", count=len(report.errors))] + errors
+            )
+        else:
+            await ctx.send(Messages.channel_copy_done)
 
     @channel.command(brief=Messages.role_channel_clone_brief)
     async def clone(self, ctx, src: Union[disnake.TextChannel, disnake.VoiceChannel], name):
@@ -245,12 +300,19 @@ class Roles(commands.Cog):
             role_data = await self.get_join_role_data(message)
             await self.message_role_reactions(message, role_data)
 
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: disnake.RawMessageUpdateEvent):
+        self.role_mappings.pop(payload.message_id, None)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: disnake.RawMessageDeleteEvent):
+        self.role_mappings.pop(payload.message_id, None)
+
     async def handle_reaction(self, ctx: ReactionContext):
-        role_data = await self.get_join_role_data(ctx.message)
-        for line in role_data:
-            if str(ctx.emoji) == line[1]:
-                await self.add_perms(line[0], ctx.member, ctx.guild)
-                break
+        role_mapping = await self.get_role_mapping(ctx.message)
+        target = role_mapping.get(str(ctx.emoji))
+        if target is not None:
+            await self.add_perms(target, ctx.member, ctx.guild)
         else:
             await ctx.message.remove_reaction(ctx.emoji, ctx.member)
 
@@ -261,11 +323,10 @@ class Roles(commands.Cog):
             return
 
         if ctx.channel.id in config.role_channels:
-            role_data = await self.get_join_role_data(ctx.message)
-            for line in role_data:
-                if str(ctx.emoji) == line[1]:
-                    await self.remove_perms(line[0], ctx.member, ctx.guild)
-                    break
+            role_mapping = await self.get_role_mapping(ctx.message)
+            target = role_mapping.get(str(ctx.emoji))
+            if target is not None:
+                await self.remove_perms(target, ctx.member, ctx.guild)
 
     @copy.error
     @clone.error
@@ -8,7 +8,6 @@ from typing import List, Union
 import utils
 from repository.database.stream_link import StreamLink
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 import re
 from requests.packages.urllib3.util.retry import Retry
@@ -145,6 +144,8 @@ class StreamLinks(commands.Cog):
         Gets thumbnail from youtube or maybe from another service.
         It downloads HTML from link and tries get thumbnail url from SEO meta tags.
         """
+        from bs4 import BeautifulSoup
+
         data = {
             'image': None,
             'upload_date': None
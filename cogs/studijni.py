@@ -1,6 +1,5 @@
 import disnake
 from disnake.ext import commands
-from lxml import etree
 import requests
 
 from config.messages import Messages
@@ -11,6 +10,8 @@ class Studijni(commands.Cog):
 
     @commands.slash_command(name="studijni", description=Messages.studijni_brief)
     async def studijni(self, inter: disnake.ApplicationCommandInteraction):
+        from lxml import etree
+
         await inter.response.defer(with_message=True)
         link = "https://www.fit.vut.cz/fit/room/C109/.cs"
         htmlparser = etree.HTMLParser()
@@ -1,5 +1,8 @@
 from disnake.ext import commands
+from features.cog_registry import cog_registry
 from features.git import Git
+from features.list_message_sender import send_list_of_messages
+from features.scheduler import scheduler
 from disnake.message import Message
 import utils
 import disnake
@@ -25,6 +28,8 @@ class System(commands.Cog):
         message: Message = await ctx.send("Pulling")
 
         pull_result = await self.git.pull()
+        # cogs could be added, removed or renamed
+        cog_registry.refresh()
         pull_parts = utils.cut_string(pull_result, 1900)
 
         await message.edit(content=f"```{pull_parts[0]}```")
@@ -34,8 +39,9 @@ class System(commands.Cog):
 
     async def create_selects(self):
         """Slices dictionary of all cogs to chunks for select."""
-        cog_files = list(utils.get_all_cogs().keys())
-        cog_names = list(utils.get_all_cogs().values())
+        cogs = cog_registry.names()
+        cog_files = list(cogs.keys())
+        cog_names = list(cogs.values())
         all_selects = []
 
         # 25 is max number of options for one select
@@ -67,8 +73,31 @@ class System(commands.Cog):
         for i, cogs in enumerate(selects):
             view.selects[i].msg = message
 
+    @commands.check(utils.is_bot_admin)
+    @commands.command(brief=Messages.jobs_brief)
+    async def jobs(self, ctx: commands.Context):
+        jobs = scheduler.list_jobs()
+        if not jobs:
+            await ctx.send(Messages.jobs_empty)
+            return
+
+        time_format = "%d.%m.%Y %H:%M:%S"
+        lines = []
+        for job in jobs:
+            lines.append(utils.fill_message(
+                "jobs_item",
+                job=job.id,
+                handler=job.handler,
+                next_run=job.next_run.strftime(time_format),
+                last_run=job.last_run.strftime(time_format) if job.last_run else Messages.jobs_never,
+                duration=f"{job.last_duration:.2f} s" if job.last_duration is not None else "-",
+                running=Messages.jobs_running if job.running else "",
+            ))
+        await send_list_of_messages(ctx, lines)
+
     @pull.error
     @cogs.error
+    @jobs.error
     async def on_command_error(self, ctx: commands.Context, error):
         if isinstance(error, commands.errors.CheckFailure):
             await ctx.send(utils.fill_message("insufficient_rights", user=ctx.author.id))
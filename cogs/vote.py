@@ -1,22 +1,29 @@
 import asyncio
 import re
-from typing import Dict
-from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
 import emoji
-from disnake import RawReactionActionEvent, Message, TextChannel
+from disnake import RawReactionActionEvent, Message, Object, TextChannel
 from disnake.errors import NotFound
 from disnake.ext import commands
 from disnake.ext.commands import Bot, Context
 
 from utils import is_command_message, str_emoji_id, fill_message
 from config import cooldowns
+from config.app_config import config
 from config.messages import Messages
 from dateutil import parser
 
+from features.config_watcher import config_watcher
+from features.debouncer import Debouncer
+from features.scheduler import scheduler
 from repository import vote_repo
 
 vote_r = vote_repo.VoteRepository()
 
+# reaction changes are written to the database in batches at most this often
+FLUSH_SECONDS = 10
+
 
 async def get_or_fetch_channel(bot: Bot, channel_id):
     channel = bot.get_channel(channel_id)
@@ -25,13 +32,6 @@ async def get_or_fetch_channel(bot: Bot, channel_id):
     return channel
 
 
-async def get_or_fetch_user(bot: Bot, user_id):
-    user = bot.get_user(user_id)
-    if user is None:
-        user = await bot.fetch_user(user_id)
-    return user
-
-
 class VoteMessage:
     class VoteOption:
         def __init__(self, emoji: str, is_unicode: bool, message: str, count: int):
@@ -39,6 +39,7 @@ class VoteMessage:
             self.message = message
             self.count = count
             self.is_unicode = is_unicode
+            self.voters: Set[int] = set()
 
     class ParseError(Exception):
         pass
@@ -67,6 +68,9 @@ class VoteMessage:
 
     def __init__(self, message: str, is_one_of: bool):
         self.is_one_of = is_one_of
+        self.status_message_id: Optional[int] = None
+        # option chosen by each user in single choice votes
+        self.choices: Dict[int, str] = {}
         if is_command_message('vote', message) or is_command_message('singlevote', message):
             message = message[(message.index('vote') + 4):]
 
@@ -99,23 +103,124 @@ class VoteMessage:
         if len(self.options) != len(set(self.options.keys())):
             raise self.ParseError()
 
+    @classmethod
+    def from_state(
+        cls,
+        question: str,
+        is_one_of: bool,
+        end_date: datetime,
+        options: List['VoteMessage.VoteOption'],
+        status_message_id: Optional[int] = None,
+    ) -> 'VoteMessage':
+        """Restore vote persisted in the database without parsing the vote message"""
+        vote = cls.__new__(cls)
+        vote.question = question
+        vote.is_one_of = is_one_of
+        vote.end_date = end_date
+        vote.options = {x.emoji: x for x in options}
+        vote.status_message_id = status_message_id
+        vote.choices = {}
+        if is_one_of:
+            for option in options:
+                for user_id in option.voters:
+                    vote.choices[user_id] = option.emoji
+        return vote
+
+    def state(self) -> List[Tuple[str, bool, str, int]]:
+        return [(x.emoji, x.is_unicode, x.message, x.count) for x in self.options.values()]
+
 
 class Vote(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
         self.vote_cache: Dict[int, VoteMessage] = {}
+        self.vote_channels: Dict[int, int] = {}
+        self.timers = scheduler.timers
+        self.status_updates = Debouncer(config.vote_status_update_seconds, self.timers)
+        # votes with changed counts and the final state of changed voters waiting for flush
+        self.dirty_votes: Set[int] = set()
+        self.dirty_voters: Dict[vote_repo.VoterKey, bool] = {}
+        # load of pending votes shared by on_ready and vote end jobs
+        self.loading: Optional[asyncio.Future] = None
+        scheduler.register("vote_end", self.send_final_message)
+        config_watcher.subscribe(self.config_changed)
+
+    def cog_unload(self):
+        scheduler.unregister("vote_end")
+        config_watcher.unsubscribe(self.config_changed)
+        self.timers.cancel("vote_flush")
+        for message_id in self.vote_cache:
+            self.status_updates.cancel(message_id)
+        self.flush_votes()
+
+    def config_changed(self, changed: Set[str]):
+        if "vote_status_update_seconds" in changed:
+            self.status_updates.interval = timedelta(seconds=config.vote_status_update_seconds)
+
+    async def wait_loaded(self):
+        """Load pending votes once, concurrent callers wait for the same load. Failed load is retried."""
+        if self.loading is None or (
+            self.loading.done() and (self.loading.cancelled() or self.loading.exception() is not None)
+        ):
+            self.loading = asyncio.ensure_future(self.load_cached())
+        await asyncio.shield(self.loading)
 
     async def load_cached(self):
-        db_votes = vote_r.get_pending_votes()
+        db_votes = list(vote_r.get_pending_votes())
+        message_ids = [v.message_id for v in db_votes]
+        questions = {row.message_id: row for row in vote_r.get_questions(message_ids)}
+        options: Dict[int, List[VoteMessage.VoteOption]] = {}
+        for row in vote_r.get_options(message_ids):
+            option = VoteMessage.VoteOption(row.emoji, row.is_unicode, row.text, row.count)
+            options.setdefault(row.message_id, []).append(option)
+        for row in vote_r.get_voters(message_ids):
+            for option in options.get(row.message_id, []):
+                if option.emoji == row.emoji:
+                    option.voters.add(row.user_id)
+
         for v in db_votes:
+            if v.message_id in self.vote_cache:
+                continue
+            if v.message_id in questions and v.message_id in options:
+                question = questions[v.message_id]
+                vote = VoteMessage.from_state(question.question, v.is_one_of, v.ends_at,
+                                              options[v.message_id], question.status_message_id)
+                self.vote_cache[v.message_id] = vote
+                self.vote_channels[v.message_id] = v.channel_id
+                self.schedule_end(v.message_id)
+                continue
+
+            # votes created before the state was persisted have to be parsed from the message once
             try:
                 chan = await get_or_fetch_channel(self.bot, v.channel_id)
                 msg = await chan.fetch_message(v.message_id)
                 self.vote_cache[v.message_id] = VoteMessage(msg.content, v.is_one_of)
+                self.vote_channels[v.message_id] = v.channel_id
                 await self.init_vote(msg)
+                vote = self.vote_cache[v.message_id]
+                await self.load_voters(msg, vote)
+                vote_r.add_state(v.message_id, vote.question, vote.state())
+                vote_r.save_tallies([], {
+                    (v.message_id, user_id, option.emoji): True
+                    for option in vote.options.values() for user_id in option.voters
+                })
             except (VoteMessage.ParseError, VoteMessage.NotEmojiError, NotFound):
                 pass
 
+    async def load_voters(self, message: Message, vote: VoteMessage):
+        """Fill voters and choices of vote parsed from the message from its reactions"""
+        for reaction in message.reactions:
+            emoji_str = str_emoji_id(reaction.emoji)
+            if emoji_str not in vote.options:
+                continue
+            async for user in reaction.users():
+                if user.id == self.bot.user.id:
+                    continue
+                vote.options[emoji_str].voters.add(user.id)
+                if vote.is_one_of:
+                    # users who voted for more options keep the first one
+                    vote.choices.setdefault(user.id, emoji_str)
+
     @cooldowns.short_cooldown
     @commands.command(rest_is_raw=True, description=Messages.vote_format, brief=Messages.vote_brief)
     async def vote(self, ctx, *, message):
@@ -145,9 +250,13 @@ class Vote(commands.Cog):
             return
 
         self.vote_cache[ctx.message.id] = parsed_vote
-        vote_r.add_vote(ctx.message.id, ctx.channel.id, parsed_vote.end_date, one_of)
+        self.vote_channels[ctx.message.id] = ctx.channel.id
+        vote_r.add_vote(ctx.message.id, ctx.channel.id, parsed_vote.end_date, one_of,
+                        parsed_vote.question, parsed_vote.state())
         await self.init_vote(ctx.message)
-        await ctx.send(Messages.vote_none)
+        status_message = await ctx.send(Messages.vote_none)
+        parsed_vote.status_message_id = status_message.id
+        vote_r.set_status_message(ctx.message.id, status_message.id)
 
     async def init_vote(self, message: Message):
         vote = self.vote_cache[message.id]
@@ -158,8 +267,7 @@ class Vote(commands.Cog):
                 vote.options[r_id].count = msg_reaction.count - 1
                 handled_opts.append(r_id)
             else:
-                async for u in msg_reaction.users():
-                    await msg_reaction.remove(u)
+                await msg_reaction.clear()
 
         for opt in vote.options:
             if opt not in handled_opts:
@@ -169,11 +277,53 @@ class Vote(commands.Cog):
                     e = self.bot.get_emoji(int(vote.options[opt].emoji))
                 await message.add_reaction(e)
 
-        if vote.end_date is not None:
-            sec = (vote.end_date - datetime.now()).total_seconds()
-            if sec < 1:
-                sec = 1
-            asyncio.ensure_future(self.send_final_message(sec, message.id, message.channel.id))
+        self.schedule_end(message.id)
+
+    def schedule_end(self, message_id: int):
+        vote = self.vote_cache[message_id]
+        if vote.end_date is None:
+            return
+        job_id = f"vote:{message_id}"
+        job = scheduler.get(job_id)
+        if job is not None and job.next_run == vote.end_date:
+            return
+        # votes which ended while the bot was offline are finished right away
+        scheduler.schedule(job_id, "vote_end", vote.end_date, {"message_id": message_id})
+
+    def mark_vote(self, message_id: int, user_id: int, emoji_str: str, added: bool):
+        """Record reaction change in memory, the database is updated by the next flush"""
+        vote = self.vote_cache[message_id]
+        option = vote.options[emoji_str]
+        if added:
+            option.voters.add(user_id)
+            if vote.is_one_of:
+                vote.choices[user_id] = emoji_str
+        else:
+            option.voters.discard(user_id)
+            if vote.choices.get(user_id) == emoji_str:
+                del vote.choices[user_id]
+        self.dirty_votes.add(message_id)
+        self.dirty_voters[(message_id, user_id, emoji_str)] = added
+
+        if not self.timers.is_scheduled("vote_flush"):
+            when = datetime.now() + timedelta(seconds=FLUSH_SECONDS)
+            self.timers.schedule("vote_flush", when, self.flush_votes_task)
+
+    def flush_votes(self):
+        counts = []
+        for message_id in self.dirty_votes:
+            vote = self.vote_cache.get(message_id)
+            if vote is None:
+                continue
+            counts.extend((message_id, opt.emoji, opt.count) for opt in vote.options.values())
+        voters = {key: added for key, added in self.dirty_voters.items() if key[0] in self.vote_cache}
+        self.dirty_votes = set()
+        self.dirty_voters = {}
+        if counts or voters:
+            vote_r.save_tallies(counts, voters)
+
+    async def flush_votes_task(self):
+        self.flush_votes()
 
     async def handle_raw_reaction_add(self, payload: RawReactionActionEvent):
         # Called from reactions.py
@@ -181,35 +331,28 @@ class Vote(commands.Cog):
             return
 
         vote = self.vote_cache[payload.message_id]
-        chan = await get_or_fetch_channel(self.bot, payload.channel_id)
-
         emoji_str = str_emoji_id(payload.emoji)
-
-        if emoji_str not in vote.options:
-            msg = await chan.fetch_message(payload.message_id)
-            usr = await get_or_fetch_user(self.bot, payload.user_id)
-            await msg.remove_reaction(payload.emoji, usr)
+        # user already voted for another option in single choice vote
+        rejected = (
+            emoji_str not in vote.options
+            or (vote.is_one_of and vote.choices.get(payload.user_id, emoji_str) != emoji_str)
+        )
+
+        if rejected:
+            if emoji_str in vote.options:
+                # Increment the counter here, so that on_raw_reaction_remove can decrement it again
+                vote.options[emoji_str].count += 1
+            chan = await get_or_fetch_channel(self.bot, payload.channel_id)
+            msg = chan.get_partial_message(payload.message_id)
+            await msg.remove_reaction(payload.emoji, Object(id=payload.user_id))
             return
 
-        if vote.is_one_of:
-            msg: Message = await chan.fetch_message(payload.message_id)
-            usr = await get_or_fetch_user(self.bot, payload.user_id)
-            for r in msg.reactions:
-                if str_emoji_id(r.emoji) == emoji_str:
-                    continue
-
-                if await r.users().find(lambda x: x.id == usr.id):
-                    # Increment the counter here, so that on_raw_reaction_remove can decrement it again
-                    vote.options[emoji_str].count += 1
-                    await msg.remove_reaction(payload.emoji, usr)
-                    return
-
         last_max_opt = max(vote.options.values(), key=lambda x: x.count).count
 
         vote.options[emoji_str].count += 1
+        self.mark_vote(payload.message_id, payload.user_id, emoji_str, True)
         if vote.options[emoji_str].count >= last_max_opt:
-            msg = await chan.fetch_message(payload.message_id)
-            await self.update_bot_vote_message(msg, chan)
+            self.schedule_status_update(payload.message_id, payload.channel_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: RawReactionActionEvent):
@@ -217,22 +360,20 @@ class Vote(commands.Cog):
             return
 
         vote = self.vote_cache[payload.message_id]
-        if str_emoji_id(payload.emoji) not in vote.options:
-            return
-
-        chan = await get_or_fetch_channel(self.bot, payload.channel_id)
         emoji_str = str_emoji_id(payload.emoji)
+        if emoji_str not in vote.options:
+            return
 
         last_max_opt = max(vote.options.values(), key=lambda x: x.count).count
 
         vote.options[emoji_str].count -= 1
+        self.mark_vote(payload.message_id, payload.user_id, emoji_str, False)
         if (vote.options[emoji_str].count + 1) == last_max_opt:
-            msg = await chan.fetch_message(payload.message_id)
-            await self.update_bot_vote_message(msg, chan)
+            self.schedule_status_update(payload.message_id, payload.channel_id)
 
     @commands.Cog.listener()
     async def on_ready(self):
-        await self.load_cached()
+        await self.wait_loaded()
 
     def get_message(self, vote: VoteMessage, final: bool):
         def singularise(msg: str):
@@ -270,24 +411,49 @@ class Vote(commands.Cog):
                 question=vote.question
             ))
 
-    async def update_bot_vote_message(self, vote_msg: Message, channel: TextChannel):
-        vote = self.vote_cache[vote_msg.id]
-        bot_msg = await channel.history(
-            limit=3,
-            after=vote_msg.created_at
-        ).get(author__id=self.bot.user.id)
-
-        if bot_msg is None:
-            return
+    def schedule_status_update(self, message_id: int, channel_id: int):
+        async def update():
+            chan = await get_or_fetch_channel(self.bot, channel_id)
+            await self.update_bot_vote_message(message_id, chan)
 
-        await bot_msg.edit(content=self.get_message(vote, False))
+        self.status_updates.call(message_id, update)
 
-    async def send_final_message(self, timeout, message_id, channel_id):
-        await asyncio.sleep(timeout)
+    async def update_bot_vote_message(self, message_id: int, channel: TextChannel):
+        vote = self.vote_cache.get(message_id)
+        if vote is None:
+            # vote ended before the update
+            return
+        if vote.status_message_id is None:
+            # votes created before the status message id was stored
+            vote_msg = await channel.fetch_message(message_id)
+            bot_msg = await channel.history(
+                limit=3,
+                after=vote_msg.created_at
+            ).get(author__id=self.bot.user.id)
+            if bot_msg is None:
+                return
+            vote.status_message_id = bot_msg.id
+            vote_r.set_status_message(message_id, bot_msg.id)
+
+        bot_msg = channel.get_partial_message(vote.status_message_id)
+        try:
+            await bot_msg.edit(content=self.get_message(vote, False))
+        except NotFound:
+            vote.status_message_id = None
+
+    async def send_final_message(self, message_id):
+        # job can run before the votes are loaded at startup
+        await self.wait_loaded()
+        if message_id not in self.vote_cache:
+            return
         vote = self.vote_cache[message_id]
-        chan = await get_or_fetch_channel(self.bot, channel_id)
+        self.status_updates.cancel(message_id)
+        self.flush_votes()
+        chan = await get_or_fetch_channel(self.bot, self.vote_channels[message_id])
         await chan.send(content=self.get_message(vote, True))
         vote_r.finish_vote(message_id)
+        del self.vote_cache[message_id]
+        del self.vote_channels[message_id]
 
 
 def setup(bot):
@@ -5,15 +5,12 @@ from io import BytesIO
 
 import disnake
 from disnake.ext import commands
-import dhash
-from PIL import Image
 
 import utils
 from config.app_config import config
 from config.messages import Messages
 from repository import image_repo
 
-dhash.force_pil()
 repo_i = image_repo.ImageRepository()
 
 
@@ -83,6 +80,10 @@ class Warden(commands.Cog):
                     pass
 
     async def saveMessageHashes(self, message: disnake.Message):
+        import dhash
+        from PIL import Image
+
+        dhash.force_pil()
         for f in message.attachments:
             fp = BytesIO()
             await f.save(fp)
@@ -169,6 +170,8 @@ class Warden(commands.Cog):
 
     async def checkDuplicate(self, message: disnake.Message):
         """Check if uploaded files are known"""
+        import dhash
+
         hashes = [x async for x in self.saveMessageHashes(message)]
 
         if len(message.attachments) > 0 and len(hashes) == 0:
@@ -1,6 +1,20 @@
-from typing import List
+from typing import Dict, List, Optional, Set
+import os
 import toml
 
+CONFIG_PATH = "config/config.toml"
+TEMPLATE_PATH = "config/config.template.toml"
+
+# parsed template, loaded once and again only by `reload_config`
+_template: Optional[dict] = None
+
+
+def load_template() -> dict:
+    global _template
+    if _template is None:
+        _template = toml.load(TEMPLATE_PATH, _dict=dict)
+    return _template
+
 
 def get_attr(toml_dict: dict, section: str, attr_key: str):
     """
@@ -9,7 +23,7 @@ def get_attr(toml_dict: dict, section: str, attr_key: str):
     try:
         return toml_dict[section][attr_key]
     except KeyError:
-        return toml.load("config/config.template.toml", _dict=dict)[section][attr_key]
+        return load_template()[section][attr_key]
 
 
 def eval_channels(toml_dict: dict, channels: list):
@@ -26,147 +40,184 @@ class Config:
     """
     Wrapper class for Config and config template.\n
     It checks value from config override and if not exists that will be take from config template.
+    Instance is a snapshot of both files, values are plain attributes.
     """
 
-    toml_dict: dict = toml.load("config/config.toml", _dict=dict)
-
-    # Authorization
-    key: str = get_attr(toml_dict, "base", "key")
-
-    # Base information
-    admin_ids: List[int] = get_attr(toml_dict, "base", "admin_ids")
-    guild_id: int = get_attr(toml_dict, "base", "guild_id")
-
-    # Database
-    db_string: str = get_attr(toml_dict, "database", "db_string")
-
-    # Base bot behavior
-    command_prefix: tuple = tuple(get_attr(toml_dict, "base", "command_prefix"))
-    default_prefix: str = get_attr(toml_dict, "base", "default_prefix")
-    ignored_prefixes: tuple = tuple(get_attr(toml_dict, "base", "ignored_prefixes"))
-
-    # Role IDs
-    mod_role: int = get_attr(toml_dict, "base", "mod_role")
-    submod_role: int = get_attr(toml_dict, "base", "submod_role")
-    helper_role: int = get_attr(toml_dict, "base", "helper_role")
-
-    # Verification
-    verification_role: str = get_attr(toml_dict, "verification", "role")
-    verification_role_id: int = get_attr(toml_dict, "verification", "role_id")
-
-    # Verification email sender settings
-    email_name: str = get_attr(toml_dict, "email", "name")
-    email_addr: str = get_attr(toml_dict, "email", "addr")
-    email_smtp_server: str = get_attr(toml_dict, "email", "smtp_server")
-    email_smtp_port: str = get_attr(toml_dict, "email", "smtp_port")
-    email_pass: str = get_attr(toml_dict, "email", "pass")
-
-    # Extensions loaded on bot start
-    extensions: List[str] = get_attr(toml_dict, "cogs", "extensions")
-
-    # Config: static values -> cannot be got/set by command
-    config_static: List[str] = get_attr(toml_dict, "config", "static")
-
-    # Roll dice
-    max_dice_at_once: int = get_attr(toml_dict, "random", "max_dice_at_once")
-    dice_before_collation: int = get_attr(toml_dict, "random", "dice_before_collation")
-    max_dice_groups: int = get_attr(toml_dict, "random", "max_dice_groups")
-    max_dice_sides: int = get_attr(toml_dict, "random", "max_dice_sides")
-    enable_room_check: bool = get_attr(toml_dict, "random", "enable_room_check")
-
-    # Karma
-    karma_ban_role_id: int = get_attr(toml_dict, "karma", "ban_role_id")
-    karma_banned_channels: List[int] = get_attr(toml_dict, "karma", "banned_channels")
-    karma_grillbot_leaderboard_size: int = get_attr(toml_dict, "karma", "grillbot_leaderboard_size")
-
-    # Voting
-    vote_minimum: int = get_attr(toml_dict, "vote", "minimum")
-    vote_minutes: int = get_attr(toml_dict, "vote", "minutes")
-
-    # Pin emoji count to pin
-    autopin_count: int = get_attr(toml_dict, "autopin", "count")
-    autopin_banned_channels: List[int] = get_attr(toml_dict, "autopin", "banned_channels")
-    autopin_banned_users: List[int] = get_attr(toml_dict, "autopin", "banned_users")
-    autopin_warning_cooldown: int = get_attr(toml_dict, "autopin", "warning_cooldown")
-
-    # Special channel IDs
-    log_channel: int = get_attr(toml_dict, "channels", "log_channel")
-    bot_dev_channel: int = get_attr(toml_dict, "channels", "bot_dev_channel")
-    vote_room: int = get_attr(toml_dict, "channels", "vote_room")
-    bot_room: int = get_attr(toml_dict, "channels", "bot_room")
-    mod_room: int = get_attr(toml_dict, "channels", "mod_room")
-
-    # Meme repost
-    meme_room: int = get_attr(toml_dict, "meme_repost", "meme_room")
-    meme_repost_room: int = get_attr(toml_dict, "meme_repost", "meme_repost_room")
-    repost_threshold: int = get_attr(toml_dict, "meme_repost", "repost_threshold")
-    meme_repost_image_extensions: list = get_attr(toml_dict, "meme_repost", "image_extensions")
-
-    # Bot rooms
-    allowed_channels: List[int] = eval_channels(
-        toml_dict, get_attr(toml_dict, "channels", "allowed_channels")
-    )
-
-    # Roles
-    role_channels: List[int] = get_attr(toml_dict, "role", "channels")
-
-    # Subjects shortcuts
-    subjects: List[str] = get_attr(toml_dict, "review", "subjects")
-    review_forbidden_roles: List[int] = get_attr(toml_dict, "review", "forbidden_roles")
-
-    # How many roles a user needs to have to be considered a rolehoarder
-    rolehoarder_default_limit: int = get_attr(toml_dict, "rolehoarder", "default_limit")
-
-    # memes
-    hug_emojis: List[str] = get_attr(toml_dict, "meme", "hug_emojis")
-    covid_channel_id: str = get_attr(toml_dict, "meme", "covid_channel_id")
-    storno_delay: int = get_attr(toml_dict, "meme", "storno_delay")
-
-    # Arcas
-    arcas_id: int = get_attr(toml_dict, "meme", "arcas_id")
-    arcas_delay: int = get_attr(toml_dict, "meme", "arcas_delay")  # Value is in hours
-    # uh oh
-    uhoh_string: str = get_attr(toml_dict, "meme", "uhoh_string")
-
-    # grillbot
-    grillbot_ids: List[int] = get_attr(toml_dict, "grillbot", "ids")
-    grillbot_api_supported_methods: List[str] = get_attr(toml_dict, "grillbot", "api_supported_methods")
-
-    # weather token to openweather API
-    weather_token: str = get_attr(toml_dict, "weather", "token")
-
-    # warden
-    duplicate_limit: int = get_attr(toml_dict, "warden", "duplicate_limit")
-    deduplication_channels: List[int] = get_attr(toml_dict, "warden", "deduplication_channels")
-    repost_ignore_users: List[int] = get_attr(toml_dict, "warden", "repost_ignore_users")
-
-    # week command
-    starting_week: int = get_attr(toml_dict, "week", "starting_week")
-
-    # absolvent
-    bc_role_id: int = get_attr(toml_dict, "absolvent", "bc_role_id")
-    ing_role_id: int = get_attr(toml_dict, "absolvent", "ing_role_id")
-
-    # Emotes
-    emote_loading: str = get_attr(toml_dict, "emote", "loading")
-
-    # util
-    ios_looptime_minutes: int = get_attr(toml_dict, "util", "ios_looptime_minutes")
-
-    # subscriptions
-    subscribable_channels: list = get_attr(toml_dict, "subscriptions", "subscribable_channels")
-
-    # exams
-    exams_page_size: int = get_attr(toml_dict, "exams", "page_size")
-    exams_paginator_duration: int = get_attr(toml_dict, "exams", "paginator_duration")
-    exams_term_channels: List[str] = get_attr(toml_dict, "exams", "term_channels")
-    exams_terms_update_interval: float = get_attr(toml_dict, "exams", "terms_update_interval")
-    exams_subscribe_default_guild: bool = get_attr(toml_dict, "exams", "subscribe_default_guild")
+    def __init__(self, toml_dict: Optional[dict] = None):
+        if toml_dict is None:
+            toml_dict = toml.load(CONFIG_PATH, _dict=dict)
+        self.toml_dict: dict = toml_dict
+
+        # Authorization
+        self.key: str = get_attr(toml_dict, "base", "key")
+
+        # Base information
+        self.admin_ids: List[int] = get_attr(toml_dict, "base", "admin_ids")
+        self.guild_id: int = get_attr(toml_dict, "base", "guild_id")
+
+        # Database
+        self.db_string: str = get_attr(toml_dict, "database", "db_string")
+
+        # Base bot behavior
+        self.command_prefix: tuple = tuple(get_attr(toml_dict, "base", "command_prefix"))
+        self.default_prefix: str = get_attr(toml_dict, "base", "default_prefix")
+        self.ignored_prefixes: tuple = tuple(get_attr(toml_dict, "base", "ignored_prefixes"))
+
+        # Role IDs
+        self.mod_role: int = get_attr(toml_dict, "base", "mod_role")
+        self.submod_role: int = get_attr(toml_dict, "base", "submod_role")
+        self.helper_role: int = get_attr(toml_dict, "base", "helper_role")
+
+        # Verification
+        self.verification_role: str = get_attr(toml_dict, "verification", "role")
+        self.verification_role_id: int = get_attr(toml_dict, "verification", "role_id")
+
+        # Verification email sender settings
+        self.email_name: str = get_attr(toml_dict, "email", "name")
+        self.email_addr: str = get_attr(toml_dict, "email", "addr")
+        self.email_smtp_server: str = get_attr(toml_dict, "email", "smtp_server")
+        self.email_smtp_port: str = get_attr(toml_dict, "email", "smtp_port")
+        self.email_pass: str = get_attr(toml_dict, "email", "pass")
+
+        # Extensions loaded on bot start
+        self.extensions: List[str] = get_attr(toml_dict, "cogs", "extensions")
+
+        # Config: static values -> cannot be got/set by command
+        self.config_static: List[str] = get_attr(toml_dict, "config", "static")
+        self.config_reload_seconds: int = get_attr(toml_dict, "config", "reload_seconds")
+
+        # Roll dice
+        self.max_dice_at_once: int = get_attr(toml_dict, "random", "max_dice_at_once")
+        self.dice_before_collation: int = get_attr(toml_dict, "random", "dice_before_collation")
+        self.max_dice_groups: int = get_attr(toml_dict, "random", "max_dice_groups")
+        self.max_dice_sides: int = get_attr(toml_dict, "random", "max_dice_sides")
+        self.enable_room_check: bool = get_attr(toml_dict, "random", "enable_room_check")
+
+        # Karma
+        self.karma_ban_role_id: int = get_attr(toml_dict, "karma", "ban_role_id")
+        self.karma_banned_channels: List[int] = get_attr(toml_dict, "karma", "banned_channels")
+        self.karma_grillbot_leaderboard_size: int = get_attr(toml_dict, "karma", "grillbot_leaderboard_size")
+        self.karma_vote_max_count: int = get_attr(toml_dict, "karma", "vote_max_count")
+
+        # Voting
+        self.vote_minimum: int = get_attr(toml_dict, "vote", "minimum")
+        self.vote_minutes: int = get_attr(toml_dict, "vote", "minutes")
+        self.vote_status_update_seconds: int = get_attr(toml_dict, "vote", "status_update_seconds")
+
+        # Pin emoji count to pin
+        self.autopin_count: int = get_attr(toml_dict, "autopin", "count")
+        self.autopin_banned_channels: List[int] = get_attr(toml_dict, "autopin", "banned_channels")
+        self.autopin_banned_users: List[int] = get_attr(toml_dict, "autopin", "banned_users")
+        self.autopin_warning_cooldown: int = get_attr(toml_dict, "autopin", "warning_cooldown")
+
+        # Special channel IDs
+        self.log_channel: int = get_attr(toml_dict, "channels", "log_channel")
+        self.bot_dev_channel: int = get_attr(toml_dict, "channels", "bot_dev_channel")
+        self.vote_room: int = get_attr(toml_dict, "channels", "vote_room")
+        self.bot_room: int = get_attr(toml_dict, "channels", "bot_room")
+        self.mod_room: int = get_attr(toml_dict, "channels", "mod_room")
+
+        # Meme repost
+        self.meme_room: int = get_attr(toml_dict, "meme_repost", "meme_room")
+        self.meme_repost_room: int = get_attr(toml_dict, "meme_repost", "meme_repost_room")
+        self.repost_threshold: int = get_attr(toml_dict, "meme_repost", "repost_threshold")
+        self.meme_repost_image_extensions: list = get_attr(toml_dict, "meme_repost", "image_extensions")
+        self.meme_repost_spool_threshold_kb: int = get_attr(toml_dict, "meme_repost", "spool_threshold_kb")
+
+        # Bot rooms
+        self.allowed_channels: List[int] = eval_channels(
+            toml_dict, get_attr(toml_dict, "channels", "allowed_channels")
+        )
+
+        # Roles
+        self.role_channels: List[int] = get_attr(toml_dict, "role", "channels")
+
+        # Subjects shortcuts
+        self.subjects: List[str] = get_attr(toml_dict, "review", "subjects")
+        self.review_forbidden_roles: List[int] = get_attr(toml_dict, "review", "forbidden_roles")
+
+        # How many roles a user needs to have to be considered a rolehoarder
+        self.rolehoarder_default_limit: int = get_attr(toml_dict, "rolehoarder", "default_limit")
+
+        # memes
+        self.hug_emojis: List[str] = get_attr(toml_dict, "meme", "hug_emojis")
+        self.covid_channel_id: str = get_attr(toml_dict, "meme", "covid_channel_id")
+        self.storno_delay: int = get_attr(toml_dict, "meme", "storno_delay")
+
+        # Arcas
+        self.arcas_id: int = get_attr(toml_dict, "meme", "arcas_id")
+        self.arcas_delay: int = get_attr(toml_dict, "meme", "arcas_delay")  # Value is in hours
+        # uh oh
+        self.uhoh_string: str = get_attr(toml_dict, "meme", "uhoh_string")
+
+        # grillbot
+        self.grillbot_ids: List[int] = get_attr(toml_dict, "grillbot", "ids")
+        self.grillbot_api_supported_methods: List[str] = get_attr(
+            toml_dict, "grillbot", "api_supported_methods"
+        )
+
+        # weather token to openweather API
+        self.weather_token: str = get_attr(toml_dict, "weather", "token")
+
+        # warden
+        self.duplicate_limit: int = get_attr(toml_dict, "warden", "duplicate_limit")
+        self.deduplication_channels: List[int] = get_attr(toml_dict, "warden", "deduplication_channels")
+        self.repost_ignore_users: List[int] = get_attr(toml_dict, "warden", "repost_ignore_users")
+
+        # week command
+        self.starting_week: int = get_attr(toml_dict, "week", "starting_week")
+
+        # absolvent
+        self.bc_role_id: int = get_attr(toml_dict, "absolvent", "bc_role_id")
+        self.ing_role_id: int = get_attr(toml_dict, "absolvent", "ing_role_id")
+
+        # Emotes
+        self.emote_loading: str = get_attr(toml_dict, "emote", "loading")
+
+        # util
+        self.ios_looptime_minutes: int = get_attr(toml_dict, "util", "ios_looptime_minutes")
+        self.ios_login_cache_minutes: int = get_attr(toml_dict, "util", "ios_login_cache_minutes")
+
+        # subscriptions
+        self.subscribable_channels: list = get_attr(toml_dict, "subscriptions", "subscribable_channels")
+
+        # exams
+        self.exams_page_size: int = get_attr(toml_dict, "exams", "page_size")
+        self.exams_paginator_duration: int = get_attr(toml_dict, "exams", "paginator_duration")
+        self.exams_term_channels: List[str] = get_attr(toml_dict, "exams", "term_channels")
+        self.exams_terms_update_interval: float = get_attr(toml_dict, "exams", "terms_update_interval")
+        self.exams_subscribe_default_guild: bool = get_attr(toml_dict, "exams", "subscribe_default_guild")
+
+        # scheduler
+        self.scheduler_jitter_seconds: int = get_attr(toml_dict, "scheduler", "jitter_seconds")
 
 
 config = Config()
 
 
-def load_config():
-    global config
-    config = Config()
+def config_mtimes() -> Dict[str, float]:
+    return {path: os.stat(path).st_mtime for path in (CONFIG_PATH, TEMPLATE_PATH)}
+
+
+def reload_config() -> Set[str]:
+    """Parse config and template again and update changed attributes of `config` in place,
+    so modules which imported `config` see new values. Nothing changes if files can't be parsed.
+    Returns names of changed attributes, see also features.config_watcher.
+    """
+    global _template
+    previous_template = _template
+    _template = toml.load(TEMPLATE_PATH, _dict=dict)
+    try:
+        snapshot = Config()
+    except Exception:
+        _template = previous_template
+        raise
+
+    values = vars(snapshot)
+    changed = {
+        key for key, value in values.items()
+        if key != "toml_dict" and getattr(config, key, None) != value
+    }
+    config.toml_dict = snapshot.toml_dict
+    config.__dict__.update({key: values[key] for key in changed})
+    return changed
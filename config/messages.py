@@ -62,7 +62,8 @@ class Messages:
     karma_getall_brief = 'Vypíše, které emoty mají hodnotu 1 a -1'
     karma_give_brief = 'Přidá karmu uživateli'
     karma_transfer_brief = 'Převede karmu z jednoho uživatele na druhého'
-    karma_vote_brief = 'Odstartuje hlasování o hodnotě zatím neohodnoceného emotu'
+    karma_vote_brief = 'Odstartuje hlasování o hodnotě zatím neohodnoceného emotu ' \
+                       '(s počtem emotů postupně o více emotech)'
     karma_revote_brief = 'Odstartuje hlasování o nové hodnotě emotu'
     karma_leaderboard_brief = 'Karma leaderboard'
     karma_bajkarboard_brief = 'Karma leaderboard reversed'
@@ -70,8 +71,9 @@ class Messages:
     karma_ishaboard_brief = 'Leaderboard rozdávání negativní karmy'
 
     karma_invalid_command = "Neznámý karma příkaz."
-    karma_vote_format = "Neočekávám žádný argument. " \
-                        f"Správný formát: `{prefix}karma vote`"
+    karma_vote_format = "Očekávám nejvýše počet emotů. " \
+                        f"Správný formát: `{prefix}karma vote [počet]`"
+    karma_vote_count = "Najednou lze hlasovat o 1 až {max} emotech."
     karma_vote_message_hack = "Hlasování o karma ohodnocení emotu"
     karma_vote_message = f"{karma_vote_message_hack} {{emote}}"
     karma_vote_info = "Hlasování skončí za **{delay}** " \
@@ -244,7 +246,10 @@ class Messages:
     review_not_on_server = "{user}, na použití tohto příkazu musíš být na FITwide serveru."
     subject_format = f"{prefix}subject [update]"
     subject_update_error = "Aktualizace se nezdařila."
-    subject_update_success = "Předměty byly úspěšně aktualizovány."
+    subject_update_success = (
+        "Předměty byly úspěšně aktualizovány. Nové předměty: {subjects}, nové detaily: {details}, "
+        "upravené detaily: {updated}, změněné programy: {programmes}."
+    )
     shortcut_brief = "Vrací stručné informace o předmětu"
     tierboard_brief = "Založeno na `reviews` z průměru tier hodnot"
     tierboard_missing_year = f"Nezadal jsi ročník a nemáš školní roli"
@@ -309,6 +314,12 @@ class Messages:
     cog_not_unloadable = 'Toto rozšíření `{cog}` je neodebratelné.'
     cog_reloaded = 'Rozšíření `{cog}` bylo načteno znovu.'
 
+    jobs_brief = 'Vypíše naplánované úlohy, jejich další spuštění a délku posledního běhu'
+    jobs_empty = 'Nejsou naplánované žádné úlohy.'
+    jobs_item = '`{job}` ({handler}) další běh: {next_run}, poslední běh: {last_run} ({duration}){running}'
+    jobs_never = 'nikdy'
+    jobs_running = ' **běží**'
+
     config_backup_brief = "Vytvoří záložní kopii konfigurace v novém souboru"
     config_get_brief = "Získa hodnotu z konfigurace"
     config_set_brief = "Nastaví hodnotu v konfiguraci"
@@ -328,6 +339,8 @@ class Messages:
     channel_help = f"{prefix}channel [clone, copy]"
     channel_copy_help = f"{prefix}channel copy [source] [destination]"
     channel_copy_done = "Práva byla zkopírována."
+    channel_copy_progress = "Kopíruji práva: {done}/{total}"
+    channel_copy_failed = "Nepodařilo se zkopírovat {count} práv:"
     channel_clone_help = f"{prefix}channel clone [source] [jméno]"
     channel_clone_done = "Kanál <#{id}> byl vytvořen."
 
@@ -1,3 +1,6 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
 import utils
 from config import messages
 from features.base_feature import BaseFeature
@@ -6,18 +9,85 @@ from repository.acl_repo import AclRepository
 messages = messages.Messages
 
 
+class AclTable:
+    """In-memory snapshot of all ACL tables.
+
+    Every group knows all snowflakes from rules of the group and its whole subtree,
+    so checking a binding is a single set lookup instead of walking the group tree.
+    """
+
+    def __init__(self, acl_repository: AclRepository):
+        children: Dict[int, List[int]] = defaultdict(list)
+        own_targets: Dict[int, Set[str]] = defaultdict(set)
+        for group in acl_repository.list_group():
+            if group.parent_id is not None:
+                children[int(group.parent_id)].append(group.id)
+        for rule in acl_repository.list_rule():
+            own_targets[int(rule.acl_group_id)].add(str(rule.acl_snowflake))
+
+        # transitive closure of rules over the subtree of every group
+        self.targets: Dict[int, Set[str]] = {}
+        for group_id in set(own_targets.keys()) | set(children.keys()):
+            targets, visited, stack = set(), {group_id}, [group_id]
+            while stack:
+                current = stack.pop()
+                targets |= own_targets.get(current, set())
+                for child_id in children.get(current, ()):
+                    if child_id not in visited:
+                        visited.add(child_id)
+                        stack.append(child_id)
+            self.targets[group_id] = targets
+
+        self.user_bindings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for binding in acl_repository.list_user():
+            self.user_bindings[str(binding.user_id)].append((binding.acl_group_id, binding.perms))
+
+        self.role_id_bindings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.role_name_bindings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for binding in acl_repository.list_role():
+            if binding.role_id is not None:
+                self.role_id_bindings[str(binding.role_id)].append((binding.acl_group_id, binding.perms))
+            else:
+                self.role_name_bindings[binding.role_name].append((binding.acl_group_id, binding.perms))
+
+    def find_perms(self, bindings: List[Tuple[int, int]], target_id) -> Optional[int]:
+        target_id = str(target_id)
+        for acl_group_id, perms in bindings:
+            if target_id in self.targets.get(int(acl_group_id), ()):
+                return perms
+        return None
+
+    def user_perms(self, member_id, target_id) -> Optional[int]:
+        return self.find_perms(self.user_bindings.get(str(member_id), []), target_id)
+
+    def role_perms(self, role, target_id) -> Optional[int]:
+        bindings = self.role_id_bindings.get(str(role.id), []) + self.role_name_bindings.get(role.name, [])
+        return self.find_perms(bindings, target_id)
+
+
 class Acl(BaseFeature):
 
     def __init__(self, acl_repository: AclRepository):
         self.acl_repo = acl_repository
+        self._table: Optional[AclTable] = None
+
+    @property
+    def table(self) -> AclTable:
+        if self._table is None:
+            self._table = AclTable(self.acl_repo)
+        return self._table
+
+    def invalidate(self):
+        """Drop the ACL snapshot, it will be loaded again on next permission check."""
+        self._table = None
 
     def get_perms(self, member_id, top_role, target, roles):
         if member_id is not None:
-            perms = self.acl_repo.find_user_exception(member_id, target)
+            perms = self.table.user_perms(member_id, target)
             if perms is not None:
                 return perms
 
-        perms = self.acl_repo.get_role_perms(top_role, target)
+        perms = self.table.role_perms(top_role, target)
 
         return perms
 
@@ -37,6 +107,7 @@ class Acl(BaseFeature):
         else:
             await ctx.send(utils.fill_message("acl_help", user=ctx.author.id))
             return
+        self.invalidate()
 
     async def handle_edit(self, ctx, args):
         if not len(args):
@@ -54,6 +125,7 @@ class Acl(BaseFeature):
         else:
             await ctx.send(utils.fill_message("acl_help", user=ctx.author.id))
             return
+        self.invalidate()
 
     async def handle_del(self, ctx, args):
         if not len(args):
@@ -71,6 +143,7 @@ class Acl(BaseFeature):
         else:
             await ctx.send(utils.fill_message("acl_help", user=ctx.author.id))
             return
+        self.invalidate()
 
     async def handle_list(self, ctx, args):
         if not len(args) or len(args) > 2:
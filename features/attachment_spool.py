@@ -0,0 +1,77 @@
+"""Downloads of message attachments which are uploaded again (e.g. meme reposts).
+
+Attachments are streamed in chunks, small ones are kept in memory and larger
+ones are spooled to a temporary file, so big videos are never held in memory
+as a whole. All attachments of a message are downloaded concurrently.
+"""
+
+import asyncio
+import io
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+import aiohttp
+import disnake
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class SpoolReport:
+    """Bytes buffered in memory by the downloads"""
+    memory: int = 0
+    peak_memory: int = 0
+
+    def allocate(self, size: int):
+        self.memory += size
+        self.peak_memory = max(self.peak_memory, self.memory)
+
+    def free(self, size: int):
+        self.memory -= size
+
+
+async def download_attachment(
+    session: aiohttp.ClientSession,
+    attachment: disnake.Attachment,
+    spool_threshold: int,
+    report: SpoolReport,
+) -> Optional[disnake.File]:
+    """Download attachment into a file suitable for sending. Returns None when the download fails."""
+    in_memory = attachment.size <= spool_threshold
+    buffer = io.BytesIO() if in_memory else tempfile.TemporaryFile()
+    try:
+        async with session.get(attachment.url) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                # spooled chunks are held in memory only until they are written
+                report.allocate(len(chunk))
+                buffer.write(chunk)
+                if not in_memory:
+                    report.free(len(chunk))
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        buffer.close()
+        return None
+
+    buffer.seek(0)
+    return disnake.File(buffer, filename=attachment.filename, description=attachment.description)
+
+
+async def download_attachments(
+    attachments: List[disnake.Attachment],
+    spool_threshold: int,
+    report: SpoolReport,
+) -> List[Optional[disnake.File]]:
+    """Download all attachments concurrently, results are in the order of `attachments`."""
+    if not attachments:
+        return []
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*[
+            download_attachment(session, attachment, spool_threshold, report) for attachment in attachments
+        ])
+
+
+def close_files(files: List[Optional[disnake.File]]):
+    for file in files:
+        if file is not None:
+            file.fp.close()
@@ -0,0 +1,127 @@
+"""Registry of cogs available in the cogs directory.
+
+Cog classes are found by parsing the source files once (no import needed), the
+registry is refreshed only after git pull. Loading and unloading through the
+registry records load state and duration of every cog and dispatches
+`extensions_changed` event, so cogs caching commands (e.g. help) can rebuild.
+"""
+
+import ast
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from disnake.ext import commands
+
+COGS_DIR = "cogs"
+
+
+@dataclass
+class CogInfo:
+    module: str
+    name: str
+    loaded: bool = False
+    load_duration: Optional[float] = None
+
+
+def find_cog_class(filename: str) -> Optional[str]:
+    """Name of the first class in file inheriting from `commands.Cog`"""
+    with open(filename, "r") as file:
+        tree = ast.parse(file.read(), filename)
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for base in node.bases:
+            if isinstance(base, ast.Attribute) and base.attr == "Cog":
+                return node.name
+    return None
+
+
+class CogRegistry:
+    def __init__(self, path: str = COGS_DIR):
+        self.path = path
+        self._cogs: Optional[Dict[str, CogInfo]] = None
+
+    @property
+    def cogs(self) -> Dict[str, CogInfo]:
+        """Available cogs by module name, sorted by module name"""
+        if self._cogs is None:
+            self.refresh()
+        return self._cogs
+
+    def refresh(self):
+        """Scan cogs directory again, load state of known cogs is kept"""
+        previous = self._cogs or {}
+        cogs = {}
+        for name in sorted(os.listdir(self.path)):
+            filename = os.path.join(self.path, name)
+            if not os.path.isfile(filename) or not name.endswith(".py"):
+                continue
+            try:
+                class_name = find_cog_class(filename)
+            except SyntaxError:
+                # broken file can't be loaded anyway
+                continue
+            if class_name is None:
+                continue
+            module = name[:-3]
+            info = CogInfo(module, class_name)
+            if module in previous:
+                info.loaded = previous[module].loaded
+                info.load_duration = previous[module].load_duration
+            cogs[module] = info
+        self._cogs = cogs
+
+    def get(self, module: str) -> Optional[CogInfo]:
+        return self.cogs.get(module)
+
+    def names(self) -> Dict[str, str]:
+        """Class names of cogs by module name"""
+        return {module: info.name for module, info in self.cogs.items()}
+
+    def _info(self, module: str) -> CogInfo:
+        info = self.cogs.get(module)
+        if info is None:
+            # e.g. cog added after last refresh
+            self.refresh()
+            info = self.cogs.setdefault(module, CogInfo(module, module))
+        return info
+
+    def changed(self, bot: commands.Bot):
+        """Dispatch `extensions_changed` event"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # extensions loaded at startup before the loop runs, nothing is cached yet
+            return
+        bot.dispatch("extensions_changed")
+
+    def load(self, bot: commands.Bot, module: str) -> float:
+        """Load extension of cog, return duration of loading in seconds"""
+        info = self._info(module)
+        start = time.perf_counter()
+        bot.load_extension(f"{self.path}.{module}")
+        info.load_duration = time.perf_counter() - start
+        info.loaded = True
+        self.changed(bot)
+        return info.load_duration
+
+    def unload(self, bot: commands.Bot, module: str):
+        info = self._info(module)
+        bot.unload_extension(f"{self.path}.{module}")
+        info.loaded = False
+        self.changed(bot)
+
+    def reload(self, bot: commands.Bot, module: str) -> float:
+        info = self._info(module)
+        start = time.perf_counter()
+        bot.reload_extension(f"{self.path}.{module}")
+        info.load_duration = time.perf_counter() - start
+        info.loaded = True
+        self.changed(bot)
+        return info.load_duration
+
+
+cog_registry = CogRegistry()
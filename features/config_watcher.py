@@ -0,0 +1,77 @@
+"""Hot reload of config.
+
+Config and its template are checked for changes by polling their modification
+time. Changed values are applied to `config` in place, so hot paths keep reading
+plain attributes, and subscribers (e.g. cogs) get names of the changed attributes.
+"""
+
+import inspect
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Set
+
+from config import app_config
+from config.app_config import config
+from features.scheduler import scheduler
+from features.timer_heap import TimerHeap
+
+Subscriber = Callable[[Set[str]], Any]
+
+
+class ConfigWatcher:
+    def __init__(self, timers: TimerHeap):
+        self.timers = timers
+        self.subscribers: List[Subscriber] = []
+        self.mtimes = app_config.config_mtimes()
+        self.started = False
+
+    def subscribe(self, callback: Subscriber):
+        """Callback (function or coroutine) is called with names of changed attributes"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def start(self):
+        """Start polling. Must be called from the running event loop."""
+        if self.started:
+            return
+        self.started = True
+        self._schedule()
+
+    def _schedule(self):
+        # zero or negative interval would poll in a busy loop
+        when = datetime.now() + timedelta(seconds=max(1, config.config_reload_seconds))
+        self.timers.schedule("config_watch", when, self.poll)
+
+    async def poll(self):
+        try:
+            if app_config.config_mtimes() != self.mtimes:
+                await self.reload()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._schedule()
+
+    async def reload(self) -> Set[str]:
+        """Reload config files and notify subscribers. Returns names of changed attributes."""
+        mtimes = app_config.config_mtimes()
+        changed = app_config.reload_config()
+        # half written file fails to parse, keep old mtimes so it's reloaded after it's complete
+        self.mtimes = mtimes
+        if changed:
+            await self.notify(changed)
+        return changed
+
+    async def notify(self, changed: Set[str]):
+        for callback in list(self.subscribers):
+            try:
+                result = callback(changed)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                traceback.print_exc()
+
+
+config_watcher = ConfigWatcher(scheduler.timers)
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+
+from features.timer_heap import Callback, TimerHeap
+
+
+class Debouncer:
+    """Coalesces repeated updates (e.g. edits of a live status message) of the same key.
+
+    The callback of a key runs at most once per `interval` seconds. Calls made in between
+    replace the pending callback, so only the latest one runs. Callbacks should render
+    the state at the time they run, not at the time they were passed.
+    """
+
+    def __init__(self, interval: float, timers: Optional[TimerHeap] = None):
+        self.interval = timedelta(seconds=interval)
+        self.timers = timers or TimerHeap()
+        self._last_run: Dict[Hashable, datetime] = {}
+
+    def call(self, key: Hashable, callback: Callback):
+        timer_key = ("debounce", key)
+        when = self.timers.next_run(timer_key)
+        if when is None:
+            last_run = self._last_run.get(key)
+            when = datetime.now() if last_run is None else max(datetime.now(), last_run + self.interval)
+
+        async def run():
+            self._last_run[key] = datetime.now()
+            await callback()
+
+        self.timers.schedule(timer_key, when, run)
+
+    def cancel(self, key: Hashable):
+        """Drop pending callback and forget the key"""
+        self.timers.cancel(("debounce", key))
+        self._last_run.pop(key, None)
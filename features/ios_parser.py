@@ -0,0 +1,200 @@
+"""Parsers for ipcs / ps / ls output from the IOS servers.
+
+Busy lab servers return thousands of lines, so every parser walks the output
+with a single precompiled regex and aggregates the stale resources per login
+instead of keeping every value.
+"""
+
+import datetime
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MONTHS = {
+    "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+    "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+
+# resources unchanged for this many minutes are reported
+MINUTES_LIMIT = 10
+
+# Every line of a login is matched and the rest of the line is an optional group, so malformed
+# lines are counted while matching (their groups are empty) instead of scanning the output again.
+
+# shmid  owner  ...  changed (Oct 19 12:34:56)
+MEMORY_REGEX = re.compile(
+    r"^\S+[ \t]+(x\S*)[ \t](?:.*[ \t]([A-Z][a-z]{2})[ \t]+(\d+)[ \t]+(\d+):(\d+):(\d+)[ \t]*$)?",
+    re.MULTILINE,
+)
+# semid  owner  ...  last-changed (Oct 19 12:34:56) year
+SEMAPHORE_REGEX = re.compile(
+    r"^\S+[ \t]+(x\S*)[ \t](?:.*[ \t]([A-Z][a-z]{2})[ \t]+(\d+)[ \t]+(\d+):(\d+):(\d+)[ \t]+\S+[ \t]*$)?",
+    re.MULTILINE,
+)
+# perms  links  owner  group  size  10-19 12:34  name
+FILE_REGEX = re.compile(
+    r"^\S+[ \t]+\S+[ \t]+(x\S*)[ \t](?:[ \t]*\S+[ \t]+\S+[ \t]+(\d+)-(\d+)[ \t]+(\d+):(\d+)[ \t]+(\S+))?",
+    re.MULTILINE,
+)
+# USER  PID  %CPU  %MEM  VSZ  RSS  TTY  STAT  START
+PROCESS_REGEX = re.compile(r"^(x\S*)[ \t](?:[ \t]*(?:\S+[ \t]+){7}(\S+))?", re.MULTILINE)
+# START column of ps is either time (12:34), month with day (Oct19) or year (2022)
+START_TIME_REGEX = re.compile(r"^(\d+):(\d+)$")
+START_DATE_REGEX = re.compile(r"^([A-Z][a-z]{2})(\d+)$")
+FILTER_PROCESS_REGEX = re.compile(r"/[a-zA-Z0-9.]+ \d+ \d+ \d+ \d+ \d+$")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResourceUsage:
+    """Number of stale resources of one login and their summed age in minutes"""
+    count: int = 0
+    total_minutes: float = 0
+
+    def add(self, minutes: float):
+        self.count += 1
+        self.total_minutes += minutes
+
+    @property
+    def average(self) -> float:
+        return self.total_minutes / self.count if self.count else 0
+
+
+@dataclass
+class FileUsage(ResourceUsage):
+    """Semaphore files in /dev/shm, tracking files not named after their owner"""
+    login_not_in_name: bool = False
+
+
+def log_skipped(kind: str, output: str, regex: re.Pattern, skipped: int):
+    """Log lines of logins which couldn't be parsed. The output is scanned again only to find an example."""
+    if skipped == 0:
+        return
+    example = ""
+    for match in regex.finditer(output):
+        # only the login group matched
+        if match.lastindex == 1:
+            end = output.find("\n", match.start())
+            example = output[match.start():end if end != -1 else len(output)]
+            break
+    logger.warning("IOS %s: skipped %d malformed lines, e.g. %r", kind, skipped, example)
+
+
+@lru_cache(maxsize=512)
+def day_seconds(year: int, month: int, day: int) -> float:
+    """Seconds from epoch to the start of the day. The same few days repeat on every line."""
+    return (datetime.datetime(year, month, day) - EPOCH).total_seconds()
+
+
+def seconds_since_epoch(now: datetime.datetime) -> float:
+    return (now - EPOCH).total_seconds()
+
+
+def minutes_since(now_seconds: float, year: int, month: int, day: int, hour: int, minute: int,
+                  second: int = 0) -> float:
+    then = day_seconds(year, month, day) + hour * 3600 + minute * 60 + second
+    return (now_seconds - then) // 60
+
+
+def parse_memory(memory: str, now: Optional[datetime.datetime] = None) -> Dict[str, ResourceUsage]:
+    now = now or datetime.datetime.now()
+    now_seconds = seconds_since_epoch(now)
+    parsed: Dict[str, ResourceUsage] = {}
+    skipped = 0
+    for login, month, day, hour, minute, second in MEMORY_REGEX.findall(memory):
+        if month not in MONTHS:
+            skipped += 1
+            continue
+        since_last_change = minutes_since(
+            now_seconds, now.year, MONTHS[month], int(day), int(hour), int(minute), int(second)
+        )
+        if since_last_change > MINUTES_LIMIT:
+            parsed.setdefault(login, ResourceUsage()).add(since_last_change)
+    log_skipped("memory", memory, MEMORY_REGEX, skipped)
+    return parsed
+
+
+def parse_semaphores(
+    semaphores: str, now: Optional[datetime.datetime] = None
+) -> Tuple[Dict[str, ResourceUsage], Dict[str, FileUsage]]:
+    now = now or datetime.datetime.now()
+    now_seconds = seconds_since_epoch(now)
+    parsed: Dict[str, ResourceUsage] = {}
+    parsed_files: Dict[str, FileUsage] = {}
+    if "soubory semaforu" in semaphores:
+        semaphores, files = semaphores.split("soubory semaforu:\n")
+    else:
+        files = ""
+
+    skipped = 0
+    for login, month, day, hour, minute, second in SEMAPHORE_REGEX.findall(semaphores):
+        if month not in MONTHS:
+            skipped += 1
+            continue
+        since_last_change = minutes_since(
+            now_seconds, now.year, MONTHS[month], int(day), int(hour), int(minute), int(second)
+        )
+        if since_last_change > MINUTES_LIMIT:
+            parsed.setdefault(login, ResourceUsage()).add(since_last_change)
+    log_skipped("semaphores", semaphores, SEMAPHORE_REGEX, skipped)
+
+    skipped = 0
+    for login, month, day, hour, minute, name in FILE_REGEX.findall(files):
+        if not name:
+            skipped += 1
+            continue
+        since_last_change = minutes_since(now_seconds, now.year, int(month), int(day), int(hour), int(minute))
+        login_not_in_name = login not in name
+        if since_last_change > MINUTES_LIMIT or login_not_in_name:
+            usage = parsed_files.setdefault(login, FileUsage())
+            usage.add(since_last_change)
+            usage.login_not_in_name |= login_not_in_name
+    log_skipped("semaphore files", files, FILE_REGEX, skipped)
+
+    return parsed, parsed_files
+
+
+def running_for(start: str, now: datetime.datetime, now_seconds: float) -> float:
+    """Minutes since process start given by the START column of ps"""
+    match = START_TIME_REGEX.match(start)
+    if match is not None:
+        hours = now.hour - int(match.group(1))
+        minutes = now.minute - int(match.group(2))
+        return hours * 60 + minutes
+
+    match = START_DATE_REGEX.match(start)
+    if match is not None:
+        minutes = minutes_since(now_seconds, now.year, MONTHS[match.group(1)], int(match.group(2)), 0, 0)
+    else:
+        # process is running since previous years
+        minutes = minutes_since(now_seconds, int(start), 1, 1, 0, 0)
+    # subtracting a day as to assume it was ran right before midnight
+    return minutes - 1440
+
+
+def parse_processes(processes: str, now: Optional[datetime.datetime] = None) -> Dict[str, ResourceUsage]:
+    now = now or datetime.datetime.now()
+    now_seconds = seconds_since_epoch(now)
+    parsed: Dict[str, ResourceUsage] = {}
+    skipped = 0
+    for login, start in PROCESS_REGEX.findall(processes):
+        if not start:
+            skipped += 1
+            continue
+        uptime = running_for(start, now, now_seconds)
+        if uptime > MINUTES_LIMIT:
+            parsed.setdefault(login, ResourceUsage()).add(uptime)
+    log_skipped("processes", processes, PROCESS_REGEX, skipped)
+    return parsed
+
+
+def filter_processes(processes: str) -> str:
+    out = []
+    for line in processes.strip().splitlines():
+        if FILTER_PROCESS_REGEX.search(line):
+            out.append(line)
+    return "\n".join(out)
@@ -1,4 +1,7 @@
 import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
 import disnake
 from disnake import Emoji, TextChannel, Member
@@ -9,15 +12,12 @@ import utils
 from config.app_config import config as cfg
 from config.messages import Messages
 from features.base_feature import BaseFeature
+from features.list_message_sender import send_list_of_messages
+from features.scheduler import scheduler
 from repository.karma_repo import KarmaRepository
 
-
-def test_emoji(db_emoji: bytearray, server_emoji: Emoji):
-    try:
-        custom_emoji = int(db_emoji)
-        return custom_emoji == server_emoji.id
-    except ValueError:
-        return False
+# results of message karma are reused for this many seconds while the reactions don't change
+MESSAGE_KARMA_TTL = 60
 
 
 def is_unicode(text):
@@ -33,20 +33,48 @@ class Karma(BaseFeature):
     def __init__(self, bot: Bot, karma_repository: KarmaRepository):
         super().__init__(bot)
         self.repo = karma_repository
-
-    async def emoji_process_vote(self, channel, emoji):
+        # message id -> (computed at, reactions signature, emojis by value, karma)
+        self.message_karma_cache: Dict[int, Tuple[float, tuple, Dict[str, list], int]] = {}
+
+    async def emoji_process_vote(
+        self, channel, emoji, revote: bool = False, queue: Optional[List[str]] = None
+    ):
+        """Start vote about emoji value. The result is processed by `emoji_finish_vote` job.
+
+        Votes about emojis (ids) in `queue` are started one after another when the previous one ends.
+        """
+        if not revote:
+            # reserve the emoji, so it isn't picked by another vote
+            self.repo.set_emoji_value(emoji, 0)
         delay = cfg.vote_minutes * 60
         message = utils.fill_message("karma_vote_message", emote=str(emoji))
         message += '\n'
         message += utils.fill_message("karma_vote_info", delay=str(delay//60), minimum=str(cfg.vote_minimum))
-        message = await channel.send(message)
-        await message.add_reaction("✅")
-        await message.add_reaction("❌")
-        await message.add_reaction("0⃣")
-        await asyncio.sleep(delay)
-
-        message = await channel.fetch_message(message.id)
+        try:
+            message = await channel.send(message)
+            await message.add_reaction("✅")
+            await message.add_reaction("❌")
+            await message.add_reaction("0⃣")
+        except disnake.HTTPException:
+            if not revote:
+                self.repo.remove_emoji(emoji)
+            raise
+
+        scheduler.schedule(
+            f"karma_vote:{message.id}",
+            "karma_emoji_vote",
+            datetime.now() + timedelta(seconds=delay),
+            {
+                "channel_id": channel.id,
+                "message_id": message.id,
+                "emoji": utils.str_emoji_id(emoji),
+                "revote": revote,
+                "queue": queue or [],
+            },
+        )
 
+    @staticmethod
+    def emoji_vote_result(message) -> Optional[int]:
         plus = 0
         minus = 0
         neutral = 0
@@ -69,40 +97,70 @@ class Karma(BaseFeature):
         else:
             return 0
 
+    async def emoji_finish_vote(
+        self, channel_id: int, message_id: int, emoji: str, revote: bool, queue: Optional[List[str]] = None
+    ):
+        channel = self.bot.get_channel(channel_id)
+        try:
+            if channel is None:
+                channel = await self.bot.fetch_channel(channel_id)
+            message = await channel.fetch_message(message_id)
+        except (disnake.NotFound, disnake.Forbidden):
+            # vote message or channel was deleted, release the reservation and go on with the queue
+            if not revote:
+                self.repo.remove_emoji(emoji)
+            if channel is not None:
+                await self.emoji_next_vote(channel, queue)
+            return
+        vote_value = self.emoji_vote_result(message)
+
+        server_emoji = None if is_unicode(emoji) else self.bot.get_emoji(int(emoji))
+        emote = str(server_emoji) if server_emoji is not None else emoji
+
+        if vote_value is not None:
+            self.repo.set_emoji_value(emoji, vote_value)
+            await channel.send(utils.fill_message("karma_vote_result", emote=emote, result=str(vote_value)))
+        else:
+            if not revote:
+                self.repo.remove_emoji(emoji)
+            await channel.send(utils.fill_message("karma_vote_notpassed",
+                               emote=emote, minimum=str(cfg.vote_minimum)))
+        await self.emoji_next_vote(channel, queue)
+
+    async def emoji_next_vote(self, channel, queue: Optional[List[str]]):
+        """Start vote about the first emoji of the queue which is still on the server and not voted about"""
+        queue = list(queue or [])
+        while queue:
+            next_id = queue.pop(0)
+            next_emoji = self.bot.get_emoji(int(next_id))
+            # emoji was removed from the server or voted by another vote while waiting in the queue
+            if next_emoji is not None and self.repo.emoji_value_raw(next_emoji) is None:
+                await self.emoji_process_vote(channel, next_emoji, queue=queue)
+                break
+
     async def emoji_vote_value(self, message):
-        if len(message.content.split()) != 2:
+        content = message.content.split()
+        if len(content) not in (2, 3) or (len(content) == 3 and not content[2].isdigit()):
             await message.channel.send(
                 Messages.karma_vote_format)
             return
+        count = int(content[2]) if len(content) == 3 else 1
+        if not 1 <= count <= cfg.karma_vote_max_count:
+            await message.channel.send(utils.fill_message("karma_vote_count", max=cfg.karma_vote_max_count))
+            return
 
-        emojis = self.repo.get_all_emojis()
-
-        for server_emoji in message.guild.emojis:
-            if not server_emoji.animated:
-                e = list(
-                    filter(
-                        lambda x: test_emoji(x.emoji_ID, server_emoji),
-                        emojis))
-
-                if len(e) == 0:
-                    self.repo.set_emoji_value(server_emoji, 0)
-                    vote_value = await self.emoji_process_vote(message.channel,
-                                                               server_emoji)
-                    emoji = server_emoji  # Save for use outside loop
-                    break
-        else:
+        voted = set(self.repo.get_emoji_values())
+        unvoted = [
+            server_emoji for server_emoji in message.guild.emojis
+            if not server_emoji.animated and str(server_emoji.id) not in voted
+        ][:count]
+
+        if not unvoted:
             await message.channel.send(Messages.karma_vote_allvoted)
             return
 
-        if vote_value is None:
-            self.repo.remove_emoji(emoji)
-            await message.channel.send(utils.fill_message("karma_vote_notpassed",
-                                       emote=str(emoji), minimum=str(cfg.vote_minimum)))
-
-        else:
-            self.repo.set_emoji_value(emoji, vote_value)
-            await message.channel.send(utils.fill_message("karma_vote_result",
-                                       emote=str(emoji), result=str(vote_value)))
+        queue = [str(server_emoji.id) for server_emoji in unvoted[1:]]
+        await self.emoji_process_vote(message.channel, unvoted[0], queue=queue)
 
     async def emoji_revote_value(self, message):
         content = message.content.split()
@@ -122,15 +180,7 @@ class Karma(BaseFeature):
                 await message.channel.send(Messages.karma_emote_not_found)
                 return
 
-        vote_value = await self.emoji_process_vote(message.channel, emoji)
-
-        if vote_value is not None:
-            self.repo.set_emoji_value(emoji, vote_value)
-            await message.channel.send(utils.fill_message("karma_vote_result",
-                                       emote=str(emoji), result=str(vote_value)))
-        else:
-            await message.channel.send(utils.fill_message("karma_vote_notpassed",
-                                       emote=str(emoji), minimum=str(cfg.vote_minimum)))
+        await self.emoji_process_vote(message.channel, emoji, revote=True)
 
     async def emoji_get_value(self, inter, emoji):
         if not is_unicode(emoji):
@@ -155,70 +205,39 @@ class Karma(BaseFeature):
                 utils.fill_message("karma_get_emote_not_voted", emote=str(emoji))
             )
 
-    async def __make_emoji_list(self, guild, emojis):
-        message = []
-        line = ""
-        is_error = False
-
-        # Fetch all custom server emoji
-        # They will be saved in the guild.emojis list
-        await guild.fetch_emojis()
-
-        for cnt, emoji_id in enumerate(emojis):
-            if cnt % 8 == 0 and cnt:
-                line += "\n"
-            if cnt % 24 == 0 and cnt:
-                message.append(line)
-                line = ""
-
-            try:
-                # Try and find the emoji in the server custom emoji list
-                # (match by id) if the current emoji_id is not an int,
-                # it's a unicode emoji, we'll handle that in the except
-                # ValueError part. If it is an int and it's not found
-                # in the emoji list, it will try to fetch it once again
-                # and as that will probably fail anyway, it'll jump to
-                # the disnake.NotFound handler which will add it to
-                # the error message
-                emoji = next((x for x in guild.emojis if x.id == int(emoji_id)), None)
-
-                if emoji is None:
-                    emoji = await guild.fetch_emoji(int(emoji_id))
-
-                line += str(emoji)
-
-            except ValueError:
-                if isinstance(emoji_id, bytearray):
-                    line += emoji_id.decode()
-                else:
-                    line += str(emoji_id)
-
-            except disnake.NotFound:
-                is_error = True
-                if isinstance(emoji_id, bytearray):
-                    self.repo.remove_emoji(emoji_id.decode())
-                else:
-                    self.repo.remove_emoji(str(emoji_id))
-
-        message.append(line)
-        message = [line for line in message if line != ""]
-        return message, is_error
+    def __make_emoji_list(self, emoji_index: Dict[int, Emoji], emoji_ids: List[str],
+                          missing: List[str]) -> List[str]:
+        """Lines of 8 emojis. Ids of custom emojis not found on the server are added to `missing`."""
+        emojis = []
+        for emoji_id in emoji_ids:
+            if not emoji_id.isdigit():
+                # unicode emoji
+                emojis.append(emoji_id)
+            elif int(emoji_id) in emoji_index:
+                emojis.append(str(emoji_index[int(emoji_id)]))
+            else:
+                missing.append(emoji_id)
+        return ["".join(emojis[i:i + 8]) for i in range(0, len(emojis), 8)]
 
     async def emoji_list_all_values(self, channel):
-        error = False
+        emoji_index = {emoji.id: emoji for emoji in channel.guild.emojis}
+        values = self.repo.get_emoji_values()
+        missing: List[str] = []
+        output = []
         for value in ['1', '-1']:
-            emojis, is_error = await self.__make_emoji_list(
-                    channel.guild,
-                    self.repo.get_ids_of_emojis_valued(value))
-            error |= is_error
-            try:
-                await channel.send("Hodnota " + value + ":")
-                for line in emojis:
-                    await channel.send(line)
-            except disnake.errors.HTTPException:
-                pass  # TODO: error handling?
+            emoji_ids = [emoji_id for emoji_id, emoji_value in values.items() if emoji_value == int(value)]
+            lines = self.__make_emoji_list(emoji_index, emoji_ids, missing)
+            if lines:
+                output.append("Hodnota " + value + ":")
+                output.extend(lines)
+
+        try:
+            await send_list_of_messages(channel, output)
+        except disnake.errors.HTTPException:
+            pass  # TODO: error handling?
 
-        if error:
+        if missing:
+            self.repo.remove_emojis(missing)
             channel = await self.bot.fetch_channel(cfg.bot_dev_channel)
             await channel.send(Messages.karma_get_missing)
 
@@ -278,30 +297,49 @@ class Karma(BaseFeature):
             karma_neg_order=k.negative.position
         )
 
-    async def message_karma(self, author: disnake.User, msg: disnake.Message):
-        reactions = msg.reactions
-        colour = 0x6d6a69
-        output = {'-1': [], '1': [], '0': []}
+    @staticmethod
+    async def reacted_by(reaction: disnake.Reaction, user_id: int) -> bool:
+        """Users of reaction are sorted by id, so one request starting right before user is enough"""
+        async for user in reaction.users(limit=1, after=disnake.Object(id=user_id - 1)):
+            return user.id == user_id
+        return False
+
+    async def compute_message_karma(self, msg: disnake.Message) -> Tuple[Dict[str, list], int]:
+        signature = tuple((utils.str_emoji_id(react.emoji), react.count) for react in msg.reactions)
+        now = time.monotonic()
+        cached = self.message_karma_cache.get(msg.id)
+        if cached is not None and now - cached[0] < MESSAGE_KARMA_TTL and cached[1] == signature:
+            return cached[2], cached[3]
+
+        values = self.repo.get_emoji_values()
+        output: Dict[str, list] = {'-1': [], '1': [], '0': []}
+        valued: List[Tuple[disnake.Reaction, int]] = []
         karma = 0
-        for react in reactions:
-            emoji = react.emoji
-            val = self.repo.emoji_value_raw(emoji)
-            if val == 1:
-                output['1'].append(emoji)
-                karma += react.count
-                async for user in react.users():
-                    if user.id == msg.author.id:
-                        karma -= 1
-                        break
-            elif val == -1:
-                output['-1'].append(emoji)
-                karma -= react.count
-                async for user in react.users():
-                    if user.id == msg.author.id:
-                        karma += 1
-                        break
+        for react in msg.reactions:
+            val = values.get(utils.str_emoji_id(react.emoji))
+            if val in (1, -1):
+                output[str(val)].append(react.emoji)
+                karma += val * react.count
+                valued.append((react, val))
             else:
-                output['0'].append(emoji)
+                output['0'].append(react.emoji)
+
+        self_reacted = await asyncio.gather(*[self.reacted_by(react, msg.author.id) for react, _ in valued])
+        for (_, val), reacted in zip(valued, self_reacted):
+            if reacted:
+                karma -= val
+
+        # drop expired results, so the cache doesn't grow with every evaluated message
+        self.message_karma_cache = {
+            key: value for key, value in self.message_karma_cache.items()
+            if now - value[0] < MESSAGE_KARMA_TTL
+        }
+        self.message_karma_cache[msg.id] = (now, signature, output, karma)
+        return output, karma
+
+    async def message_karma(self, author: disnake.User, msg: disnake.Message):
+        colour = 0x6d6a69
+        output, karma = await self.compute_message_karma(msg)
         embed = disnake.Embed(title='Karma zprávy')
         embed.add_field(name="Zpráva", value=msg.jump_url, inline=False)
         for key in ['1', '-1', '0']:
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import disnake
+
+Target = Union[disnake.Role, disnake.Member]
+
+
+@dataclass
+class PendingOverwrite:
+    channel: disnake.abc.GuildChannel
+    target: Target
+    overwrite: Optional[disnake.PermissionOverwrite]
+    future: asyncio.Future
+
+
+@dataclass
+class PermissionReport:
+    """Progress of a batch of overwrite changes"""
+    total: int
+    done: int = 0
+    errors: List[Tuple[disnake.abc.GuildChannel, Target, Exception]] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.done >= self.total
+
+
+def role_permissions_for(channel: disnake.abc.GuildChannel, member: disnake.Member) -> disnake.Permissions:
+    """Permissions of member in channel without member's own overwrite (roles and their overwrites only)."""
+    guild = channel.guild
+    base = disnake.Permissions(guild.default_role.permissions.value)
+    for role in member.roles:
+        base.value |= role.permissions.value
+    if base.administrator:
+        return disnake.Permissions.all()
+
+    overwrites = channel.overwrites
+    everyone = overwrites.get(guild.default_role)
+    if everyone is not None:
+        allow, deny = everyone.pair()
+        base.value = (base.value & ~deny.value) | allow.value
+
+    allow_value = deny_value = 0
+    for role in member.roles:
+        if role.is_default() or role not in overwrites:
+            continue
+        allow, deny = overwrites[role].pair()
+        allow_value |= allow.value
+        deny_value |= deny.value
+    base.value = (base.value & ~deny_value) | allow_value
+    return base
+
+
+class PermissionExecutor:
+    """Applies channel permission overwrites in bulk.
+
+    Changes are queued per channel and a change of the same target in the same channel
+    replaces the one that wasn't sent yet. Every channel is drained by its own worker,
+    so requests to one channel (one discord rate limit bucket) are serial, while at most
+    `max_channels` channels are processed concurrently.
+    """
+
+    def __init__(self, max_channels: int = 5):
+        self.max_channels = max_channels
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[int, Dict[int, PendingOverwrite]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    def queue(
+        self,
+        channel: disnake.abc.GuildChannel,
+        target: Target,
+        overwrite: Optional[disnake.PermissionOverwrite]
+    ) -> asyncio.Future:
+        """Schedule overwrite change. Returned future is resolved after the change is applied."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_channels)
+
+        changes = self._pending.setdefault(channel.id, {})
+        previous = changes.get(target.id)
+        future = previous.future if previous is not None else asyncio.get_event_loop().create_future()
+        changes[target.id] = PendingOverwrite(channel, target, overwrite, future)
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.ensure_future(self._drain(channel.id))
+        return future
+
+    async def _drain(self, channel_id: int):
+        async with self._semaphore:
+            changes = self._pending[channel_id]
+            while changes:
+                change = changes.pop(next(iter(changes)))
+                try:
+                    await change.channel.set_permissions(change.target, overwrite=change.overwrite)
+                except Exception as error:
+                    if not change.future.done():
+                        change.future.set_exception(error)
+                else:
+                    if not change.future.done():
+                        change.future.set_result(None)
+            del self._pending[channel_id]
+            del self._workers[channel_id]
+
+    async def apply(
+        self,
+        changes: Iterable[Tuple[disnake.abc.GuildChannel, Target, Optional[disnake.PermissionOverwrite]]],
+        progress: Optional[Callable[[PermissionReport], Awaitable[None]]] = None,
+        progress_interval: float = 2.0,
+    ) -> PermissionReport:
+        """Queue all changes and wait for them.
+
+        `progress` is awaited at most once per `progress_interval` seconds and after the last change.
+        """
+        futures = {}
+        for channel, target, overwrite in changes:
+            futures[self.queue(channel, target, overwrite)] = (channel, target)
+
+        report = PermissionReport(len(futures))
+        last_progress = time.monotonic()
+        for future in futures:
+            try:
+                await future
+            except Exception as error:
+                channel, target = futures[future]
+                report.errors.append((channel, target, error))
+            report.done += 1
+
+            now = time.monotonic()
+            if progress is not None and (report.finished or now - last_progress >= progress_interval):
+                last_progress = now
+                await progress(report)
+        return report
@@ -11,12 +11,14 @@ from features.git import Git
 class Presence(BaseFeature):
     def __init__(self, bot: Bot):
         super().__init__(bot)
-        self.git = Git()
-
-        self.activity = disnake.Game(
-            start=datetime.datetime.utcnow(),
-            name=config.default_prefix + 'god'
-            f' | Running hash {self.git.short_hash()}')
+        self.start = datetime.datetime.utcnow()
+        self.activity = None
 
     async def set_presence(self):
+        if self.activity is None:
+            # git is read after connecting, it isn't needed sooner
+            self.activity = disnake.Game(
+                start=self.start,
+                name=config.default_prefix + 'god'
+                f' | Running hash {Git().short_hash()}')
         await self.bot.change_presence(activity=self.activity)
@@ -1,6 +1,9 @@
-from bs4 import BeautifulSoup
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import aiohttp
 import disnake
-import requests
 
 from repository import review_repo
 from features import sports
@@ -8,6 +11,168 @@ from config.app_config import config
 import utils
 
 
+class ReviewPages:
+    """Embeds of subject reviews rendered lazily, only when the page is shown.
+
+    Behaves like a list of embeds for `EmbedView`.
+    """
+
+    def __init__(self, manager: "ReviewManager", author, rows, subject: str, description: str):
+        self.manager = manager
+        self.author = author
+        self.rows = rows
+        self.subject = subject
+        self.description = description
+        self.embeds = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx: int) -> disnake.Embed:
+        idx = idx % len(self.rows)
+        if idx not in self.embeds:
+            review, likes, dislikes = self.rows[idx]
+            page = f"{idx+1}/{len(self.rows)}"
+            self.embeds[idx] = self.manager.make_embed(
+                self.author, review, self.subject, self.description, page, likes, dislikes
+            )
+        return self.embeds[idx]
+
+    def __setitem__(self, idx: int, embed: disnake.Embed):
+        self.embeds[idx % len(self.rows)] = embed
+
+
+SUBJECT_FETCH_TIMEOUT = 30
+
+# subject shortcut and its name, credits, type, end and link of one programme table row
+SubjectRow = Tuple[str, Tuple[str, str, str, str, str]]
+
+
+def parse_programme_page(content: bytes) -> Tuple[str, str, List[List[SubjectRow]]]:
+    """Parse programme page into its shortcut, full name and rows of subject tables (one per semester)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    tables = soup.select("table")
+
+    # remove last table with information about PVT and PVA subjects (applicable mainly for BIT)
+    if len(tables) % 2:
+        tables = tables[:-1]
+
+    # specialization shortcut for correct year definition in DB
+    specialization = soup.select("main p strong")[0].get_text()
+    full_specialization = soup.select("h1")[0].get_text()
+
+    parsed = []
+    for table in tables:
+        rows = []
+        for row in table.select("tbody tr"):
+            columns = row.find_all("td")
+            rows.append((row.find_all("th")[0].get_text(), (
+                columns[0].get_text(),  # name
+                columns[1].get_text(),  # credits
+                columns[2].get_text(),  # type
+                columns[3].get_text(),  # end
+                columns[0].find("a").attrs["href"],  # link
+            )))
+        parsed.append(rows)
+    return specialization, full_specialization, parsed
+
+
+@dataclass
+class SubjectSyncReport:
+    subjects: int = 0
+    details: int = 0
+    updated_details: int = 0
+    programmes: int = 0
+
+
+class SubjectCatalogue:
+    """Subjects, their details and programmes loaded from DB at once.
+
+    Changes are only kept in memory and `apply` saves them in one transaction.
+    """
+
+    def __init__(self, repo: review_repo.ReviewRepository):
+        self.repo = repo
+        self.subjects: Set[str] = {shortcut for shortcut, in repo.get_all_subjects()}
+        self.details: Dict[str, Dict] = {
+            detail["shortcut"].lower(): detail for detail in repo.get_all_subject_details()
+        }
+        self.programmes: Dict[str, Dict] = {
+            programme.shortcut: {
+                "shortcut": programme.shortcut, "name": programme.name, "link": programme.link
+            }
+            for programme in repo.get_all_programmes()
+        }
+        self.new_subjects: Set[str] = set()
+        self.new_details: Set[str] = set()
+        self.changed_details: Set[str] = set()
+        self.new_programmes: Set[str] = set()
+        self.changed_programmes: Set[str] = set()
+
+    def add_subject(self, shortcut: str) -> bool:
+        """Add subject if it doesn't exist yet. Returns True when it was added."""
+        shortcut = shortcut.lower()
+        if shortcut in self.subjects:
+            return False
+        self.subjects.add(shortcut)
+        self.new_subjects.add(shortcut)
+        return True
+
+    def get_details(self, shortcut: str) -> Optional[Dict]:
+        """Details of subject, modify them in place and call `mark_changed`"""
+        return self.details.get(shortcut.lower())
+
+    def set_details(self, **details):
+        key = details["shortcut"].lower()
+        if key in self.details:
+            # keep the stored shortcut, it's the primary key
+            details["shortcut"] = self.details[key]["shortcut"]
+            self.details[key].update(details)
+            self.mark_changed(key)
+        else:
+            self.details[key] = details
+            self.new_details.add(key)
+
+    def mark_changed(self, shortcut: str):
+        key = shortcut.lower()
+        if key not in self.new_details:
+            self.changed_details.add(key)
+
+    def set_programme(self, shortcut: str, name: str, link: str):
+        programme = self.programmes.get(shortcut)
+        if programme is None:
+            self.programmes[shortcut] = {"shortcut": shortcut, "name": name, "link": link}
+            self.new_programmes.add(shortcut)
+        elif programme["link"] != link:
+            programme.update(name=name, link=link)
+            if shortcut not in self.new_programmes:
+                self.changed_programmes.add(shortcut)
+
+    def apply(self) -> SubjectSyncReport:
+        report = SubjectSyncReport(
+            subjects=len(self.new_subjects),
+            details=len(self.new_details),
+            updated_details=len(self.changed_details),
+            programmes=len(self.new_programmes) + len(self.changed_programmes),
+        )
+        if report != SubjectSyncReport():
+            self.repo.save_subject_catalogue(
+                subjects=list(self.new_subjects),
+                new_details=[self.details[key] for key in self.new_details],
+                changed_details=[self.details[key] for key in self.changed_details],
+                new_programmes=[self.programmes[key] for key in self.new_programmes],
+                changed_programmes=[self.programmes[key] for key in self.changed_programmes],
+            )
+        self.new_subjects.clear()
+        self.new_details.clear()
+        self.changed_details.clear()
+        self.new_programmes.clear()
+        self.changed_programmes.clear()
+        return report
+
+
 class ReviewManager:
     """Helper class for reviews"""
 
@@ -15,7 +180,7 @@ class ReviewManager:
         self.bot = bot
         self.repo = review_repo.ReviewRepository()
 
-    def make_embed(self, msg_author, review, subject, description, page):
+    def make_embed(self, msg_author, review, subject, description, page, likes=0, dislikes=0):
         """Create new embed for reviews"""
         embed = disnake.Embed(title=f"{subject.upper()} reviews", description=description)
         embed.colour = 0x6D6A69
@@ -38,9 +203,7 @@ class ReviewManager:
                     text = text[:1024]
                     embed.add_field(name="Text page", value=f"1/{pages}", inline=False)
                 embed.add_field(name="Text", value=text, inline=False)
-            likes = self.repo.get_votes_count(review.id, True)
             embed.add_field(name="Likes", value=f"👍{likes}")
-            dislikes = self.repo.get_votes_count(review.id, False)
             embed.add_field(name="Dislikes", value=f"👎{dislikes}")
             diff = likes - dislikes
             if diff > 0:
@@ -70,9 +233,8 @@ class ReviewManager:
                 idx += 1
             embed.set_field_at(idx, name="Text", value=text, inline=False)
             idx += 1
-        likes = self.repo.get_votes_count(review.id, True)
+        likes, dislikes = self.repo.get_votes_counts(review.id)
         embed.set_field_at(idx, name="Likes", value=f"👍{likes}")
-        dislikes = self.repo.get_votes_count(review.id, False)
         idx += 1
         if add_new_field or fields_cnt <= idx:
             embed.add_field(name="Dislikes", value=f"👎{dislikes}")
@@ -107,25 +269,17 @@ class ReviewManager:
             if not result:
                 return None
         reviews = self.repo.get_subject_reviews(result.shortcut)
-        review_cnt = reviews.count()
         name = self.repo.get_subject_details(result.shortcut)
         name_str = ""
         if name:
             name_str += f"{name.name}\n"
-        if review_cnt == 0:
+        if not reviews:
             description = f"{name_str}*No reviews*"
             return [self.make_embed(author, None, result.shortcut, description, "1/1")]
         else:
-            embeds = []
-            for idx in range(review_cnt):
-                review = reviews[idx].Review
-                description = f"{name_str}**Average tier:** {round(reviews[idx].avg_tier)}"
-                page = f"{idx+1}/{review_cnt}"
-
-                embeds.append(
-                    self.make_embed(author, review, result.shortcut, description, page)
-                )
-            return embeds
+            avg_tier = sum(row.Review.tier for row in reviews) / len(reviews)
+            description = f"{name_str}**Average tier:** {round(avg_tier)}"
+            return ReviewPages(self, author, reviews, result.shortcut, description)
 
     def remove(self, author, subject):
         """Remove review from DB"""
@@ -142,42 +296,56 @@ class ReviewManager:
         if not relevance or relevance.vote != vote:
             self.repo.add_vote(review_id, vote, author)
 
-    def update_subject_types(self, link, MIT):
-        """Send request to `link`, parse page and find all subjects.
-        Add new subjects to DB, if subject already exists update its years.
-        For MITAI links please set `MIT` to True.
-        If update succeeded return True, otherwise False
-        """
-        response = requests.get(link)
-        if response.status_code != 200:
-            return False
-        soup = BeautifulSoup(response.content, "html.parser")
-        tables = soup.select("table")
+    async def fetch_programme_page(self, session: aiohttp.ClientSession, link: str) -> Optional[bytes]:
+        try:
+            async with session.get(link) as response:
+                if response.status != 200:
+                    return None
+                return await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
 
-        # remove last table with information about PVT and PVA subjects (applicable mainly for BIT)
-        if len(tables) % 2:
-            tables = tables[:-1]
+    async def update_subjects(self, links: List[Tuple[str, bool]]) -> Optional[SubjectSyncReport]:
+        """Update subjects, their details and programmes from programme pages and sports.
+        `links` are pairs of programme page link and whether it's a MITAI programme.
+        Pages are downloaded concurrently and all changes are saved in one transaction.
+        If any page can't be downloaded nothing is changed and None is returned.
+        """
+        timeout = aiohttp.ClientTimeout(total=SUBJECT_FETCH_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            pages = await asyncio.gather(*[self.fetch_programme_page(session, link) for link, _ in links])
+        if None in pages:
+            return None
 
-        # specialization shortcut for correct year definition in DB
-        specialization = soup.select("main p strong")[0].get_text()
-        full_specialization = soup.select("h1")[0].get_text()
+        loop = asyncio.get_event_loop()
+        parsed = await asyncio.gather(*[
+            loop.run_in_executor(None, parse_programme_page, page) for page in pages
+        ])
+        try:
+            sports_list = await sports.VutSports.get_sports()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
 
-        programmme_db = self.repo.get_programme(specialization)
-        if not programmme_db or programmme_db.link != link:
-            self.repo.set_programme(specialization, full_specialization, link)
+        catalogue = SubjectCatalogue(self.repo)
+        # pages are applied in the order of links, later programmes extend years of shared subjects
+        for (link, MIT), (specialization, full_specialization, tables) in zip(links, parsed):
+            catalogue.set_programme(specialization, full_specialization, link)
+            self.update_subject_types(catalogue, specialization, tables, MIT)
+        self.update_sport_subjects(catalogue, sports_list)
+        return catalogue.apply()
 
+    def update_subject_types(self, catalogue: SubjectCatalogue, specialization: str, tables, MIT):
+        """Add new subjects of programme `specialization` to catalogue,
+        if subject already exists update its years.
+        For MITAI programmes please set `MIT` to True.
+        """
         sem = 1
         year = 1
-        for table in tables:
-            rows = table.select("tbody tr")
-            for row in rows:
-                shortcut = row.find_all("th")[0].get_text()
+        for rows in tables:
+            for shortcut, columns in rows:
                 # update subject DB
-                if not self.repo.get_subject(shortcut.lower()).first():
-                    self.repo.add_subject(shortcut.lower())
-                columns = row.find_all("td")
-                name = columns[0].get_text()
-                type = columns[2].get_text()
+                catalogue.add_subject(shortcut)
+                name, credits, type, end, card = columns
                 degree = "BIT"
                 for_year = "VBIT"
                 if type == "P":
@@ -191,65 +359,62 @@ class ReviewManager:
                         for_year = "VMIT"
                 if MIT:
                     degree = "MIT"
-                detail = self.repo.get_subject_details(shortcut)
+                detail = catalogue.get_details(shortcut)
                 semester = "Z"
                 if sem == 2:
                     semester = "L"
                 if not detail:
                     # subject not in DB
-                    self.repo.set_subject_details(
-                        shortcut,
-                        name,
-                        columns[1].get_text(),  # credits
-                        semester,
-                        columns[3].get_text(),  # end
-                        columns[0].find("a").attrs["href"],  # link
-                        type,
-                        for_year,
-                        degree,
+                    catalogue.set_details(
+                        shortcut=shortcut,
+                        name=name,
+                        credits=credits,
+                        semester=semester,
+                        end=end,
+                        card=card,
+                        type=type,
+                        year=for_year,
+                        degree=degree,
                     )
                 else:
                     changed = False
-                    if name != detail.name:
+                    if name != detail["name"]:
                         # Update name mainly for courses that are not opened
-                        detail.name = name
+                        detail["name"] = name
                         changed = True
-                    if for_year not in detail.year.split(", "):
+                    if for_year not in detail["year"].split(", "):
                         # subject already in DB with different year (applicable mainly for MIT)
-                        if type not in detail.type.split(", "):
-                            detail.type += f", {type}"
-                        if detail.year:
-                            detail.year += f", {for_year}"
+                        if type not in detail["type"].split(", "):
+                            detail["type"] += f", {type}"
+                        if detail["year"]:
+                            detail["year"] += f", {for_year}"
                         changed = True
-                    if semester not in detail.semester.split(", "):
+                    if semester not in detail["semester"].split(", "):
                         # subject already in DB with different semester (e.g. RET)
-                        detail.semester += f", {semester}"
+                        detail["semester"] += f", {semester}"
                         changed = True
-                    if degree not in detail.degree.split(", "):
+                    if degree not in detail["degree"].split(", "):
                         # subject already in DB with different degree (e.g. RET)
-                        detail.degree += f", {degree}"
+                        detail["degree"] += f", {degree}"
                         changed = True
                     if changed:
-                        self.repo.update_subject(detail)
+                        catalogue.mark_changed(shortcut)
             sem += 1
             if sem == 3:
                 year += 1
                 sem = 1
-        return True
 
-    def update_sport_subjects(self):
-        sports_list = sports.VutSports().get_sports()
+    def update_sport_subjects(self, catalogue: SubjectCatalogue, sports_list: List[sports.SportData]):
         for item in sports_list:
-            if not self.repo.get_subject(item.shortcut.lower()).first():
-                self.repo.add_subject(item.shortcut.lower())
-                self.repo.set_subject_details(
-                    item.shortcut,
-                    item.name,
-                    1,
-                    item.semester.value,
-                    "Za",
-                    item.subject_id,
-                    "V",
-                    "VBIT, VMIT",
-                    "BIT, MIT"
+            if catalogue.add_subject(item.shortcut):
+                catalogue.set_details(
+                    shortcut=item.shortcut,
+                    name=item.name,
+                    credits=1,
+                    semester=item.semester.value,
+                    end="Za",
+                    card=item.subject_id,
+                    type="V",
+                    year="VBIT, VMIT",
+                    degree="BIT, MIT",
                 )
@@ -0,0 +1,186 @@
+"""Central scheduler of delayed and periodic jobs.
+
+Jobs are persisted in the database, so they survive restarts, and all of them
+(together with short-lived timers of the cogs, see `Scheduler.timers`) wait in
+one timer heap. Cogs register handlers by name, a job only stores the handler
+name and its keyword arguments. Jobs of a handler that isn't registered
+(e.g. its cog is unloaded) stay in the database until the handler comes back.
+"""
+
+import asyncio
+import json
+import random
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from features.timer_heap import TimerHeap
+from repository.database.scheduler import ScheduledJob
+from repository.scheduler_repo import SchedulerRepository
+
+Handler = Callable[..., Awaitable[None]]
+
+
+@dataclass
+class Job:
+    id: str
+    handler: str
+    next_run: datetime
+    args: Dict[str, Any] = field(default_factory=dict)
+    interval: Optional[int] = None
+    jitter: int = 0
+    last_run: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    running: bool = False
+
+    @property
+    def is_periodic(self) -> bool:
+        return self.interval is not None
+
+    def to_db(self) -> ScheduledJob:
+        return ScheduledJob(
+            id=self.id,
+            handler=self.handler,
+            args=json.dumps(self.args),
+            next_run=self.next_run,
+            interval=self.interval,
+            jitter=self.jitter,
+            last_run=self.last_run,
+            last_duration=self.last_duration,
+        )
+
+    @classmethod
+    def from_db(cls, row: ScheduledJob) -> 'Job':
+        return cls(
+            id=row.id,
+            handler=row.handler,
+            next_run=row.next_run,
+            args=json.loads(row.args),
+            interval=row.interval,
+            jitter=row.jitter,
+            last_run=row.last_run,
+            last_duration=row.last_duration,
+        )
+
+
+class Scheduler:
+    def __init__(self, repository: SchedulerRepository):
+        self.repo = repository
+        self.timers = TimerHeap()
+        self.started = False
+        self._jobs: Optional[Dict[str, Job]] = None
+        self._handlers: Dict[str, Handler] = {}
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def jobs(self) -> Dict[str, Job]:
+        if self._jobs is None:
+            self._jobs = {row.id: Job.from_db(row) for row in self.repo.get_jobs()}
+        return self._jobs
+
+    def register(self, name: str, handler: Handler, concurrency: int = 1):
+        """Register handler of jobs. At most `concurrency` jobs of the handler run at once."""
+        self._handlers[name] = handler
+        if self._limits.get(name) != concurrency:
+            self._limits[name] = concurrency
+            self._semaphores.pop(name, None)
+        for job in self.jobs.values():
+            if job.handler == name:
+                self._arm(job)
+
+    def unregister(self, name: str):
+        self._handlers.pop(name, None)
+        for job in self.jobs.values():
+            if job.handler == name:
+                self.timers.cancel(("job", job.id))
+
+    def start(self):
+        """Arm all persisted jobs. Must be called from the running event loop."""
+        if self.started:
+            return
+        self.started = True
+        for job in self.jobs.values():
+            self._arm(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        return sorted(self.jobs.values(), key=lambda job: job.next_run)
+
+    def schedule(
+        self,
+        job_id: str,
+        handler: str,
+        when: Optional[datetime] = None,
+        args: Optional[Dict[str, Any]] = None,
+        interval: Optional[int] = None,
+        jitter: int = 0,
+    ) -> Job:
+        """Create or replace job. Arguments must be JSON serializable.
+
+        :param when: time of the first run, now if not set
+        :param interval: seconds between runs of periodic job
+        :param jitter: up to this many seconds are randomly added to every following run
+        """
+        previous = self.jobs.get(job_id)
+        job = Job(job_id, handler, when or datetime.now(), args or {}, interval, jitter)
+        if previous is not None:
+            job.last_run = previous.last_run
+            job.last_duration = previous.last_duration
+        self.jobs[job_id] = job
+        self.repo.save_job(job.to_db())
+        self._arm(job)
+        return job
+
+    def cancel(self, job_id: str):
+        if self.jobs.pop(job_id, None) is not None:
+            self.repo.remove_job(job_id)
+        self.timers.cancel(("job", job_id))
+
+    def _arm(self, job: Job):
+        if not self.started or job.running or job.handler not in self._handlers:
+            return
+        self.timers.schedule(("job", job.id), job.next_run, lambda: self._run(job))
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self._limits.get(name, 1))
+        return self._semaphores[name]
+
+    async def _run(self, job: Job):
+        async with self._semaphore(job.handler):
+            handler = self._handlers.get(job.handler)
+            if handler is None or self.jobs.get(job.id) is not job:
+                # handler was unregistered or job cancelled while waiting for the semaphore
+                return
+            job.running = True
+            job.last_run = datetime.now()
+            start = time.monotonic()
+            try:
+                await handler(**job.args)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                job.running = False
+                job.last_duration = time.monotonic() - start
+
+        if self.jobs.get(job.id) is not job:
+            # replaced or cancelled during the run
+            return
+        if not job.is_periodic:
+            self.cancel(job.id)
+            return
+
+        next_run = job.next_run + timedelta(seconds=job.interval)
+        if next_run < datetime.now():
+            next_run = datetime.now() + timedelta(seconds=job.interval)
+        job.next_run = next_run + timedelta(seconds=random.uniform(0, job.jitter))
+        self.repo.save_job(job.to_db())
+        self._arm(job)
+
+
+scheduler = Scheduler(SchedulerRepository())
@@ -1,12 +1,17 @@
-from typing import List
-import requests
+import asyncio
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import aiohttp
 
-from bs4 import BeautifulSoup
 from dataclasses import dataclass
 from enum import Enum
 from urllib.parse import urlparse
 from urllib.parse import parse_qs
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
 
 class Semester(Enum):
     LS = "Letní"
@@ -27,14 +32,34 @@ class SportData:
 
 
 class VutSports:
+    """Sports offered by CESA, all pages are downloaded concurrently and the result is cached"""
+
+    URL = "https://www.cesa.vutbr.cz/studenti/sporty"
+    CACHE_TTL = 60 * 60
+    _cache: Optional[Tuple[float, List[SportData]]] = None
+    _lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    async def get_page(session: aiohttp.ClientSession, page: int) -> bytes:
+        async with session.get(VutSports.URL, params={"str": page}) as res:
+            res.raise_for_status()
+            return await res.read()
+
     @staticmethod
-    def get_page(session: requests.Session, page: int) -> bytes:
-        with session.get(f"https://www.cesa.vutbr.cz/studenti/sporty?str={page}") as res:
-            return res.content
+    def number_of_pages(soup: "BeautifulSoup") -> int:
+        pagination_list = soup.find("ul", {"class": "pagination__list"})
+        if pagination_list is None:
+            return 1
+        page_indexes = [
+            int(item.get_text()) for item in pagination_list.find_all("li") if item.get_text().isnumeric()
+        ]
+        return max(page_indexes, default=1)
 
     @staticmethod
-    def parse_sports(soup: BeautifulSoup, output_dict: dict) -> None:
+    def parse_sports(soup: "BeautifulSoup", output_dict: dict) -> None:
         subject_list = soup.find("ul", {"class": "c-subjects__list"})
+        if subject_list is None:
+            return
         subjects = subject_list.find_all("li")
         if not subjects:
             return
@@ -72,32 +97,44 @@ class VutSports:
                 }
 
     @staticmethod
-    def get_sports() -> List[SportData]:
-        session = requests.Session()
+    def parse_pages(pages: List[bytes], output_dict: dict) -> int:
+        """Parse sports of all pages into `output_dict`.
+        Returns number of pages according to pagination of the first page.
+        Whole parsing is CPU heavy, it's run in the executor.
+        """
+        from bs4 import BeautifulSoup
+
+        number_of_pages = 1
+        for index, data in enumerate(pages):
+            soup = BeautifulSoup(data, "lxml")
+            if index == 0:
+                number_of_pages = VutSports.number_of_pages(soup)
+            VutSports.parse_sports(soup, output_dict)
+        return number_of_pages
 
-        data = VutSports.get_page(session, 1)
-
-        soup = BeautifulSoup(data, "html.parser")
-        pagination_list = soup.find("ul", {"class": "pagination__list"})
-        pagination_list_items = pagination_list.find_all("li")
-        page_indexes = [
-            int(item.get_text()) for item in pagination_list_items if item.get_text().isnumeric()
-        ]
-        number_of_pages = max(page_indexes)
+    @staticmethod
+    async def get_sports() -> List[SportData]:
+        """Return sports, pages are downloaded only if the cached ones are older than `CACHE_TTL`"""
+        if VutSports._lock is None:
+            VutSports._lock = asyncio.Lock()
+        async with VutSports._lock:
+            if VutSports._cache is not None and time.monotonic() - VutSports._cache[0] < VutSports.CACHE_TTL:
+                return VutSports._cache[1]
+            sports = await VutSports.fetch_sports()
+            VutSports._cache = (time.monotonic(), sports)
+            return sports
 
+    @staticmethod
+    async def fetch_sports() -> List[SportData]:
+        loop = asyncio.get_event_loop()
         output_dict = {}
-        VutSports.parse_sports(soup, output_dict)
-
-        if number_of_pages > 1:
-            for page_index in range(2, number_of_pages):
-                data = VutSports.get_page(session, page_index)
-                soup = BeautifulSoup(data, "html.parser")
-                VutSports.parse_sports(soup, output_dict)
-
-        session.close()
-
-        output = []
-        for id, data in output_dict.items():
-            output.append(SportData.from_dict(id, data))
-
-        return output
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            data = await VutSports.get_page(session, 1)
+            number_of_pages = await loop.run_in_executor(None, VutSports.parse_pages, [data], output_dict)
+            pages = await asyncio.gather(*[
+                VutSports.get_page(session, page_index) for page_index in range(2, number_of_pages + 1)
+            ])
+
+        # output_dict is only touched by the worker until it finishes
+        await loop.run_in_executor(None, VutSports.parse_pages, pages, output_dict)
+        return [SportData.from_dict(id, data) for id, data in output_dict.items()]
@@ -0,0 +1,113 @@
+"""Autocomplete index of subjects.
+
+Subjects are looked up by their shortcut and by their full name. Prefixes are
+answered from a trie and other substrings from an n-gram index, so no query
+scans all subjects. Results are ranked by match type and by the number of
+reviews of the subject.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# substrings are indexed by n-grams of this length, shorter queries use n-grams of their length
+NGRAM = 3
+MAX_RESULTS = 25
+
+
+class PrefixTrie:
+    """Maps every prefix of inserted keys to the values of those keys"""
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def insert(self, key: str, value: str):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(value)
+
+    def find(self, prefix: str) -> Set[str]:
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+
+class SubjectIndex:
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.popularity: Dict[str, int] = {}
+        self.shortcut_trie = PrefixTrie()
+        self.name_trie = PrefixTrie()
+        self.ngrams: Dict[str, Set[str]] = {}
+        # searchable text of each subject, used to verify n-gram candidates
+        self.texts: Dict[str, Tuple[str, str]] = {}
+
+    def __contains__(self, shortcut: str) -> bool:
+        return shortcut in self.texts
+
+    def add(self, shortcut: str, name: Optional[str] = None):
+        """Add subject or its name. Adding already indexed subject again is cheap."""
+        shortcut = shortcut.lower()
+        name = name or ""
+        if self.texts.get(shortcut) == (shortcut, name.lower()):
+            return
+        if name:
+            self.names[shortcut] = name
+        text = (shortcut, name.lower())
+        self.texts[shortcut] = text
+
+        self.shortcut_trie.insert(shortcut, shortcut)
+        for word in text[1].split():
+            self.name_trie.insert(word, shortcut)
+        for part in text:
+            for size in range(1, NGRAM + 1):
+                for i in range(len(part) - size + 1):
+                    self.ngrams.setdefault(part[i:i + size], set()).add(shortcut)
+
+    def update(self, subjects: Iterable[str], names: Dict[str, str], popularity: Dict[str, int]):
+        """Add new subjects and names, index built before is kept."""
+        for shortcut in subjects:
+            self.add(shortcut, names.get(shortcut.lower()))
+        self.popularity = popularity
+
+    def substring_candidates(self, query: str) -> Set[str]:
+        size = min(NGRAM, len(query))
+        candidates: Optional[Set[str]] = None
+        for i in range(len(query) - size + 1):
+            matches = self.ngrams.get(query[i:i + size], set())
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        return {
+            shortcut for shortcut in candidates
+            if query in self.texts[shortcut][0] or query in self.texts[shortcut][1]
+        }
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[str]:
+        query = query.lower().strip()
+        if not query:
+            ranked = sorted(self.texts, key=lambda x: (-self.popularity.get(x, 0), x))
+            return ranked[:limit]
+
+        shortcut_prefix = self.shortcut_trie.find(query)
+        # trie can still contain words of a renamed subject
+        name_prefix = {
+            shortcut for shortcut in self.name_trie.find(query) - shortcut_prefix
+            if any(word.startswith(query) for word in self.texts[shortcut][1].split())
+        }
+        substring = self.substring_candidates(query) - shortcut_prefix - name_prefix
+
+        results: List[str] = []
+        for group in (shortcut_prefix, name_prefix, substring):
+            results += sorted(group, key=lambda x: (-self.popularity.get(x, 0), x))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def label(self, shortcut: str) -> str:
+        name = self.names.get(shortcut)
+        label = f"{shortcut} - {name}" if name else shortcut
+        # autocomplete option names are limited to 100 characters
+        return label[:100]
@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import traceback
+from datetime import datetime
+from heapq import heappop, heappush
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class TimerHeap:
+    """Runs callbacks at given times using one sleeping task for all of them.
+
+    Every callback is identified by a key, scheduling the same key again replaces
+    the previous time. Replaced and cancelled entries stay in the heap and are skipped
+    when they are popped.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, Hashable]] = []
+        self._jobs: Dict[Hashable, Tuple[int, datetime, Callback]] = {}
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def schedule(self, key: Hashable, when: datetime, callback: Callback):
+        seq = next(self._counter)
+        self._jobs[key] = (seq, when, callback)
+        heappush(self._heap, (when, seq, key))
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        else:
+            # new entry can be earlier than the one runner is waiting for
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable):
+        self._jobs.pop(key, None)
+
+    def is_scheduled(self, key: Hashable) -> bool:
+        return key in self._jobs
+
+    def next_run(self, key: Hashable) -> Optional[datetime]:
+        job = self._jobs.get(key)
+        return job[1] if job is not None else None
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._heap.clear()
+        self._jobs.clear()
+
+    def _is_stale(self, seq: int, key: Hashable) -> bool:
+        job = self._jobs.get(key)
+        return job is None or job[0] != seq
+
+    async def _run(self):
+        while True:
+            while self._heap and self._is_stale(self._heap[0][1], self._heap[0][2]):
+                heappop(self._heap)
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            when, seq, key = self._heap[0]
+            delay = (when - datetime.now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heappop(self._heap)
+            _, _, callback = self._jobs.pop(key)
+            asyncio.ensure_future(self._call(callback))
+
+    @staticmethod
+    async def _call(callback: Callback):
+        try:
+            await callback()
+        except Exception:
+            traceback.print_exc()
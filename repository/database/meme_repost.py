@@ -7,5 +7,5 @@ class MemeRepost(database.base):
 
     original_message_id = Column(String, primary_key=True, nullable=False, unique=True)
     author_id = Column(String, nullable=False)
-    reposted_message_id = Column(String, nullable=False)
-    secondary_repost_message_id = Column(String, nullable=True)
+    reposted_message_id = Column(String, nullable=False, index=True)
+    secondary_repost_message_id = Column(String, nullable=True, index=True)
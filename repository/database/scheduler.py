@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Integer, Float
+
+from repository.database import database
+
+
+class ScheduledJob(database.base):
+    __tablename__ = 'bot_scheduled_jobs'
+
+    id = Column(String, primary_key=True)
+    handler = Column(String, nullable=False)
+    # JSON encoded keyword arguments of the handler
+    args = Column(String, nullable=False, default='{}')
+    next_run = Column(DateTime, nullable=False)
+    # periodic jobs are run again after this many seconds, one-shot jobs are removed after the run
+    interval = Column(Integer, nullable=True)
+    jitter = Column(Integer, nullable=False, default=0)
+    last_run = Column(DateTime, nullable=True)
+    last_duration = Column(Float, nullable=True)
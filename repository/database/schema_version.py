@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String
+
+from repository.database import database
+
+
+class SchemaVersion(database.base):
+    __tablename__ = 'bot_schema_version'
+
+    # hash of all declared tables, see db_migrations.schema_version
+    version = Column(String, primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, DateTime, Boolean
+from sqlalchemy import Column, BigInteger, DateTime, Boolean, String, Integer, ForeignKey
 
 from repository.database import database
 
@@ -10,3 +10,30 @@ class Vote(database.base):
     channel_id = Column(BigInteger, nullable=False)
     ends_at = Column(DateTime, nullable=True)
     is_one_of = Column(Boolean, default=False, nullable=False)
+
+
+class VoteQuestion(database.base):
+    __tablename__ = 'bot_vote_questions'
+
+    message_id = Column(BigInteger, ForeignKey('bot_votes.message_id', ondelete='CASCADE'), primary_key=True)
+    question = Column(String, nullable=False)
+    status_message_id = Column(BigInteger, nullable=True)
+
+
+class VoteOption(database.base):
+    __tablename__ = 'bot_vote_options'
+
+    message_id = Column(BigInteger, ForeignKey('bot_votes.message_id', ondelete='CASCADE'), primary_key=True)
+    emoji = Column(String, primary_key=True)
+    is_unicode = Column(Boolean, nullable=False)
+    text = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+
+class VoteVoter(database.base):
+    __tablename__ = 'bot_vote_voters'
+
+    message_id = Column(BigInteger, ForeignKey('bot_votes.message_id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    emoji = Column(String, primary_key=True)
@@ -1,3 +1,4 @@
+import hashlib
 import re
 
 from repository.database import database, session
@@ -10,23 +11,52 @@ from repository.review_repo import ReviewRepository
 from repository.database.hugs import HugsTable
 from repository.database.pin_map import PinMap  # noqa: F401
 from repository.database.stream_link import StreamLink  # noqa: F401
-from repository.database.vote import Vote  # noqa: F401
+from repository.database.vote import Vote, VoteQuestion, VoteOption, VoteVoter  # noqa: F401
 from repository.database.subscription import Subscription  # noqa: F401
 from repository.database.meme_repost import MemeRepost  # noqa: F401
 from repository.database.exams import ExamsTermsMessage  # noqa: F401
+from repository.database.scheduler import ScheduledJob  # noqa: F401
+from repository.database.schema_version import SchemaVersion
 
 from config.app_config import config
 
 
-def init_db(commit: bool = True):
+def schema_version() -> str:
+    """Hash of tables, columns and indexes declared by the models"""
+    parts = []
+    for table in database.base.metadata.sorted_tables:
+        parts.append(table.name)
+        for column in table.columns:
+            parts.append(f"{column.name}:{column.type}:{column.nullable}:{column.primary_key}")
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            parts.append(f"{index.name}:{','.join(column.name for column in index.columns)}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def init_db(commit: bool = True, force: bool = False):
+    """Create missing tables and indexes.
+    Skipped if models didn't change since the last run, unless `force` is set.
+    """
+    SchemaVersion.__table__.create(database.db, checkfirst=True)
+    version = schema_version()
+    if not force and session.query(SchemaVersion).filter(SchemaVersion.version == version).one_or_none():
+        return
+
     database.base.metadata.create_all(database.db)
 
+    # create_all doesn't add indexes declared later to already existing tables
+    for table in database.base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(database.db, checkfirst=True)
+
+    session.query(SchemaVersion).delete()
+    session.add(SchemaVersion(version=version))
     if commit:
         session.commit()
 
 
 def load_dump(filename: str):
-    init_db(False)
+    init_db(False, force=True)
 
     session.query(Karma).delete()
     session.query(Karma_emoji).delete()
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 import utils
 from sqlalchemy import func
 from repository.base_repository import BaseRepository
@@ -19,18 +21,19 @@ class Karma_data():
 
 
 class KarmaRepository(BaseRepository):
+    # emoji id -> value, shared by all instances and kept in sync by set_emoji_value/remove_emoji
+    _emoji_values: Optional[Dict[str, int]] = None
 
     def __init__(self):
         super().__init__()
 
-    def get_ids_of_emojis_valued(self, val):
-        """Returns a list of ids of emojis with specified value"""
-        emojis = session.query(Karma_emoji).filter(Karma_emoji.value == val)
-        return [emoji.emoji_ID for emoji in emojis]
-
-    def get_all_emojis(self):
-        """Returns a list of Karma_emoji objects."""
-        return session.query(Karma_emoji)
+    def get_emoji_values(self) -> Dict[str, int]:
+        """Returns cached values of all voted emojis."""
+        if KarmaRepository._emoji_values is None:
+            KarmaRepository._emoji_values = {
+                emoji.emoji_ID: emoji.value for emoji in session.query(Karma_emoji)
+            }
+        return KarmaRepository._emoji_values
 
     def emoji_value(self, emoji_id):
         """Returns the value of an emoji.
@@ -41,10 +44,7 @@ class KarmaRepository(BaseRepository):
     def emoji_value_raw(self, emoji_id):
         """Returns the value of an emoji.
         If the emoji has not been voted for, returns None."""
-        emoji = session.query(Karma_emoji).\
-            filter(Karma_emoji.emoji_ID == utils.str_emoji_id(emoji_id)).\
-            one_or_none()
-        return emoji.value if emoji else None
+        return self.get_emoji_values().get(utils.str_emoji_id(emoji_id))
 
     def set_emoji_value(self, emoji_id, value: int):
         emoji = Karma_emoji(emoji_ID=utils.str_emoji_id(emoji_id),
@@ -52,12 +52,23 @@ class KarmaRepository(BaseRepository):
         # Merge == 'insert on duplicate key update'
         session.merge(emoji)
         session.commit()
+        self.get_emoji_values()[emoji.emoji_ID] = int(value)
 
     def remove_emoji(self, emoji_id):
         session.query(Karma_emoji).\
             filter(Karma_emoji.emoji_ID == utils.str_emoji_id(emoji_id)).\
             delete()
         session.commit()
+        self.get_emoji_values().pop(utils.str_emoji_id(emoji_id), None)
+
+    def remove_emojis(self, emoji_ids: List[str]):
+        """Removes all given emojis with one query."""
+        session.query(Karma_emoji).\
+            filter(Karma_emoji.emoji_ID.in_(emoji_ids)).\
+            delete(synchronize_session=False)
+        session.commit()
+        for emoji_id in emoji_ids:
+            self.get_emoji_values().pop(emoji_id, None)
 
     def update_karma(self, member, giver, emoji_value, remove=False):
         self.update_karma_get(member, emoji_value)
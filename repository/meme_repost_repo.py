@@ -1,9 +1,13 @@
 from repository.database import session
 from repository.database.meme_repost import MemeRepost
-from typing import Union
+from typing import List, Union
 
 
 class MemeRepostRepo:
+    @staticmethod
+    def get_all() -> List[MemeRepost]:
+        return session.query(MemeRepost).all()
+
     @staticmethod
     def find_repost_by_original_message_id(message_id: int) -> Union[MemeRepost, None]:
         return session.query(MemeRepost).filter(
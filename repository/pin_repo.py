@@ -27,5 +27,9 @@ class PinRepository(BaseRepository):
         session.query(PinMap).filter(PinMap.channel_id == channel_id).delete()
         session.commit()
 
+    def remove_channels(self, channel_ids: List[str]):
+        session.query(PinMap).filter(PinMap.channel_id.in_(channel_ids)).delete(synchronize_session=False)
+        session.commit()
+
     def get_mappings(self) -> List[PinMap]:
         return list(session.query(PinMap).all())
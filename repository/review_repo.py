@@ -1,27 +1,43 @@
 import datetime
 import math
-from sqlalchemy import func, desc, asc
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, desc
 
 from repository.base_repository import BaseRepository
 from repository.database import session
 from repository.database.review import Programme, Review, ReviewRelevance, Subject, Subject_details
 
 
+class TierboardRow(NamedTuple):
+    shortcut: str
+    avg_tier: float
+    degree: str
+    type: str
+    semester: str
+    year: str
+
+
 class ReviewRepository(BaseRepository):
+    # precomputed tierboard shared by all instances, dropped whenever reviews or subject details change
+    _tierboard: Optional[List[TierboardRow]] = None
+
     def __init__(self):
         super().__init__()
 
     def get_subject_reviews(self, subject):
+        """Returns all reviews of subject with their like and dislike counts, most liked first."""
         return (
             session.query(
                 Review,
-                func.avg(Review.tier).label("avg_tier"),
-                func.count(Review.relevance).filter(ReviewRelevance.vote).label("total"),
+                func.count(ReviewRelevance.review).filter(ReviewRelevance.vote.is_(True)).label("likes"),
+                func.count(ReviewRelevance.review).filter(ReviewRelevance.vote.is_(False)).label("dislikes"),
             )
             .filter(Review.subject == subject)
             .outerjoin(Review.relevance)
             .group_by(Review)
-            .order_by(desc("total"))
+            .order_by(desc("likes"))
+            .all()
         )
 
     def get_review_by_id(self, id):
@@ -38,6 +54,7 @@ class ReviewRepository(BaseRepository):
         review = Review(id=id, tier=tier, anonym=anonym, text_review=text, date=datetime.date.today())
         session.merge(review)
         session.commit()
+        self.invalidate_tierboard()
 
     def add_review(self, author, subject, tier, anonym: bool, text):
         try:
@@ -54,9 +71,11 @@ class ReviewRepository(BaseRepository):
         except Exception:
             session.rollback()
             raise
+        self.invalidate_tierboard()
 
     def remove(self, id):
         session.query(Review).filter(Review.id == id).delete()
+        self.invalidate_tierboard()
 
     def get_votes_count(self, review_id, vote: bool):
         return (
@@ -65,6 +84,18 @@ class ReviewRepository(BaseRepository):
             .count()
         )
 
+    def get_votes_counts(self, review_id) -> Tuple[int, int]:
+        """Returns likes and dislikes of review with one query."""
+        likes, dislikes = (
+            session.query(
+                func.count(ReviewRelevance.review).filter(ReviewRelevance.vote.is_(True)),
+                func.count(ReviewRelevance.review).filter(ReviewRelevance.vote.is_(False)),
+            )
+            .filter(ReviewRelevance.review == review_id)
+            .one()
+        )
+        return likes, dislikes
+
     def get_vote_by_author(self, review_id, author):
         return (
             session.query(ReviewRelevance)
@@ -88,6 +119,15 @@ class ReviewRepository(BaseRepository):
     def get_all_subjects(self):
         return session.query(Subject.shortcut).all()
 
+    def get_subject_names(self) -> Dict[str, str]:
+        """Names of subjects with details by lowercase shortcut"""
+        rows = session.query(Subject_details.shortcut, Subject_details.name).all()
+        return {shortcut.lower(): name for shortcut, name in rows}
+
+    def get_review_counts(self) -> Dict[str, int]:
+        rows = session.query(Review.subject, func.count(Review.id)).group_by(Review.subject).all()
+        return dict(rows)
+
     def get_subject_details(self, shortcut):
         return (
             session.query(Subject_details)
@@ -100,40 +140,44 @@ class ReviewRepository(BaseRepository):
         session.merge(subject)
         session.commit()
 
-    def gen_tierboard_subquery(self, type, sem, degree, year):
-        return (
-            session.query(Subject.reviews, Subject_details, func.avg(Review.tier).label("avg_tier"))
-            .outerjoin(Subject.reviews)
-            .group_by(Subject)
-            .outerjoin(Subject_details, Subject_details.shortcut.ilike(Subject.shortcut))
-            .group_by(Subject_details.shortcut)
-            .group_by(Review.subject)
-            .filter(Subject_details.degree.contains(degree))
-            .filter(Subject_details.type.contains(type))
-            .filter(Subject_details.semester.contains(sem))
-            .filter(Subject_details.year.contains(year))
-            .subquery()
-        )
+    def get_tierboard_cache(self) -> List[TierboardRow]:
+        """Average tiers of all reviewed subjects with details, computed once until reviews change."""
+        if ReviewRepository._tierboard is None:
+            averages = (
+                session.query(Review.subject, func.avg(Review.tier).label("avg_tier"))
+                .group_by(Review.subject)
+                .all()
+            )
+            details = {detail.shortcut.lower(): detail for detail in session.query(Subject_details)}
+            rows = []
+            for subject, avg_tier in averages:
+                detail = details.get(subject.lower())
+                if detail is None or avg_tier is None:
+                    continue
+                rows.append(TierboardRow(
+                    detail.shortcut, float(avg_tier), detail.degree or "", detail.type or "",
+                    detail.semester or "", detail.year or "",
+                ))
+            rows.sort(key=lambda row: (row.avg_tier, row.shortcut))
+            ReviewRepository._tierboard = rows
+        return ReviewRepository._tierboard
+
+    @staticmethod
+    def invalidate_tierboard():
+        ReviewRepository._tierboard = None
+
+    def get_tierboard_all(self, type, sem, degree, year) -> List[TierboardRow]:
+        """Subjects matching the filter sorted by average tier"""
+        return [
+            row for row in self.get_tierboard_cache()
+            if degree in row.degree and type in row.type and sem in row.semester and year in row.year
+        ]
 
     def get_tierboard(self, type, sem, degree, year, offset=0):
-        subquery = self.gen_tierboard_subquery(type, sem, degree, year)
-        return (
-            session.query(subquery.c.shortcut, subquery.c.avg_tier)
-            .filter(subquery.c.avg_tier != None)  # noqa: E711
-            .order_by(asc("avg_tier"))
-            .offset(offset)
-            .limit(10)
-            .all()
-        )
+        return self.get_tierboard_all(type, sem, degree, year)[offset:offset + 10]
 
     def get_tierboard_page_count(self, type, sem, degree, year):
-        subquery = self.gen_tierboard_subquery(type, sem, degree, year)
-        return math.ceil((
-            session.query(subquery.c.shortcut, subquery.c.avg_tier)
-            .filter(subquery.c.avg_tier != None)  # noqa: E711
-            .order_by(asc("avg_tier"))
-            .count()
-        )/10)
+        return math.ceil(len(self.get_tierboard_all(type, sem, degree, year)) / 10)
 
     def set_subject_details(self, shortcut, name, credits, semester, end, card, type, for_year, degree):
         subject = Subject_details(
@@ -149,10 +193,42 @@ class ReviewRepository(BaseRepository):
         )
         session.merge(subject)
         session.commit()
+        self.invalidate_tierboard()
 
     def update_subject(self, subject: Subject_details):
         session.merge(subject)
         session.commit()
+        self.invalidate_tierboard()
+
+    def get_all_subject_details(self) -> List[Dict]:
+        """All subject details as dictionaries of columns"""
+        columns = Subject_details.__table__.columns.keys()
+        rows = session.query(*[getattr(Subject_details, column) for column in columns]).all()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get_all_programmes(self) -> List[Programme]:
+        return session.query(Programme).all()
+
+    def save_subject_catalogue(
+        self,
+        subjects: List[str],
+        new_details: List[Dict],
+        changed_details: List[Dict],
+        new_programmes: List[Dict],
+        changed_programmes: List[Dict],
+    ):
+        """Insert new and update changed subjects, details and programmes in one transaction"""
+        try:
+            session.bulk_insert_mappings(Subject, [{"shortcut": shortcut} for shortcut in subjects])
+            session.bulk_insert_mappings(Subject_details, new_details)
+            session.bulk_update_mappings(Subject_details, changed_details)
+            session.bulk_insert_mappings(Programme, new_programmes)
+            session.bulk_update_mappings(Programme, changed_programmes)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        self.invalidate_tierboard()
 
     def get_programme(self, shortcut):
         return session.query(Programme).filter(Programme.shortcut == shortcut).first()
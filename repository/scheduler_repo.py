@@ -0,0 +1,22 @@
+from typing import List
+
+from repository.base_repository import BaseRepository
+from repository.database import session
+from repository.database.scheduler import ScheduledJob
+
+
+class SchedulerRepository(BaseRepository):
+    def __init__(self):
+        super().__init__()
+
+    def get_jobs(self) -> List[ScheduledJob]:
+        return session.query(ScheduledJob).all()
+
+    def save_job(self, job: ScheduledJob):
+        # Merge == 'insert on duplicate key update'
+        session.merge(job)
+        session.commit()
+
+    def remove_job(self, job_id: str):
+        session.query(ScheduledJob).filter(ScheduledJob.id == job_id).delete()
+        session.commit()
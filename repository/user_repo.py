@@ -2,6 +2,7 @@ from repository.base_repository import BaseRepository
 from repository.database import session
 from repository.database.verification import Permit, Valid_person
 from enum import IntEnum
+from typing import Dict, Iterable
 
 
 class VerifyStatus(IntEnum):
@@ -64,3 +65,21 @@ class UserRepository(BaseRepository):
         )
 
         return user
+
+    def get_years_by_logins(self, logins: Iterable[str]) -> Dict[str, str]:
+        """Returns year of every known login from `logins` using single query"""
+        rows = (
+            session.query(Valid_person.login, Valid_person.year)
+            .filter(Valid_person.login.in_(list(logins)))
+            .all()
+        )
+        return {login: year for login, year in rows}
+
+    def get_discord_ids_by_logins(self, logins: Iterable[str]) -> Dict[str, str]:
+        """Returns discord ID of every verified login from `logins` using single query"""
+        rows = (
+            session.query(Permit.login, Permit.discord_ID)
+            .filter(Permit.login.in_(list(logins)))
+            .all()
+        )
+        return {login: discord_id for login, discord_id in rows}
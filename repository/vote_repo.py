@@ -1,27 +1,112 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import or_
+from sqlalchemy import or_, tuple_
 
 from repository.base_repository import BaseRepository
-from repository.database.vote import Vote
+from repository.database.vote import Vote, VoteOption, VoteQuestion, VoteVoter
 from repository.database import session
 from datetime import datetime
 
+# (message_id, user_id, emoji)
+VoterKey = Tuple[int, int, str]
+
 
 class VoteRepository(BaseRepository):
     def __init__(self):
         super().__init__()
 
     def get_pending_votes(self) -> List[Vote]:
-        return session.query(Vote).filter(or_(Vote.ends_at is None, Vote.ends_at >= datetime.now()))
+        """Running votes and persisted votes which ended while the bot was offline."""
+        persisted = session.query(VoteQuestion.message_id)
+        return session.query(Vote).filter(or_(
+            Vote.ends_at is None,
+            Vote.ends_at >= datetime.now(),
+            Vote.message_id.in_(persisted),
+        ))
 
     def add_vote(
-        self, message_id: int, channel_id: int, ends_at: Optional[datetime], is_one_of: bool = False
+        self,
+        message_id: int,
+        channel_id: int,
+        ends_at: Optional[datetime],
+        is_one_of: bool = False,
+        question: Optional[str] = None,
+        options: Iterable[Tuple[str, bool, str, int]] = (),
     ):
+        """Options are tuples (emoji, is_unicode, text, count) in the order of the vote message."""
         vote = Vote(message_id=message_id, channel_id=channel_id, ends_at=ends_at, is_one_of=is_one_of)
         session.add(vote)
+        session.flush()
+        if question is not None:
+            self.add_state(message_id, question, options, commit=False)
+        session.commit()
+
+    def add_state(
+        self,
+        message_id: int,
+        question: str,
+        options: Iterable[Tuple[str, bool, str, int]],
+        commit: bool = True
+    ):
+        """Persist parsed vote, so it can be restored without fetching the message."""
+        session.merge(VoteQuestion(message_id=message_id, question=question))
+        for position, (emoji, is_unicode, text, count) in enumerate(options):
+            session.merge(VoteOption(
+                message_id=message_id,
+                emoji=emoji,
+                is_unicode=is_unicode,
+                text=text,
+                position=position,
+                count=count,
+            ))
+        if commit:
+            session.commit()
+
+    def set_status_message(self, message_id: int, status_message_id: int):
+        session.query(VoteQuestion).filter(VoteQuestion.message_id == message_id).update(
+            {VoteQuestion.status_message_id: status_message_id}
+        )
+        session.commit()
+
+    def get_questions(self, message_ids: List[int]) -> List[VoteQuestion]:
+        return session.query(VoteQuestion).filter(VoteQuestion.message_id.in_(message_ids)).all()
+
+    def get_options(self, message_ids: List[int]) -> List[VoteOption]:
+        return (
+            session.query(VoteOption)
+            .filter(VoteOption.message_id.in_(message_ids))
+            .order_by(VoteOption.message_id, VoteOption.position)
+            .all()
+        )
+
+    def get_voters(self, message_ids: List[int]) -> List[VoteVoter]:
+        return session.query(VoteVoter).filter(VoteVoter.message_id.in_(message_ids)).all()
+
+    def save_tallies(self, counts: List[Tuple[int, str, int]], voters: Dict[VoterKey, bool]):
+        """Write batch of changes in one transaction.
+
+        :param counts: tuples (message_id, emoji, count) of changed options
+        :param voters: final state of changed votes, True when the vote was added and False when removed
+        """
+        if counts:
+            session.bulk_update_mappings(VoteOption, [
+                {"message_id": message_id, "emoji": emoji, "count": count}
+                for message_id, emoji, count in counts
+            ])
+        if voters:
+            keys = list(voters.keys())
+            session.query(VoteVoter).filter(
+                tuple_(VoteVoter.message_id, VoteVoter.user_id, VoteVoter.emoji).in_(keys)
+            ).delete(synchronize_session=False)
+            session.bulk_insert_mappings(VoteVoter, [
+                {"message_id": message_id, "user_id": user_id, "emoji": emoji}
+                for (message_id, user_id, emoji), added in voters.items() if added
+            ])
         session.commit()
 
     def finish_vote(self, message_id: str):
+        session.query(VoteVoter).filter(VoteVoter.message_id == message_id).delete()
+        session.query(VoteOption).filter(VoteOption.message_id == message_id).delete()
+        session.query(VoteQuestion).filter(VoteQuestion.message_id == message_id).delete()
         session.query(Vote).filter(Vote.message_id == message_id).delete()
         session.commit()
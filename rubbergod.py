@@ -1,6 +1,7 @@
 import traceback
 import argparse
 import logging
+import time
 
 from disnake import Embed, TextChannel, AllowedMentions, Intents
 from disnake.ext import commands
@@ -9,6 +10,9 @@ import utils
 from config.messages import Messages
 from config.app_config import config
 from features import presence
+from features.cog_registry import cog_registry
+from features.config_watcher import config_watcher
+from features.scheduler import scheduler
 
 import repository.db_migrations as migrations
 
@@ -35,7 +39,7 @@ elif args.load_subjects:
     migrations.load_subjects()
     exit(0)
 elif args.init_db:
-    migrations.init_db()
+    migrations.init_db(force=True)
     print("Init complete")
     exit(0)
 
@@ -74,6 +78,8 @@ async def on_ready():
     if bot_room is not None:
         await bot_room.send(Messages.on_ready_message)
 
+    scheduler.start()
+    config_watcher.start()
     await presence.set_presence()
     print("Ready")
 
@@ -157,14 +163,23 @@ async def on_error(event, *args, **kwargs):
             await channel_out.send(f"```\n{message}```")
 
 
+startup = time.perf_counter()
+
 # Create missing tables at start
 migrations.init_db()
+print(f"Database ready ({(time.perf_counter() - startup) * 1000:.0f} ms)")
 
-bot.load_extension("cogs.system")
-print("System cog loaded")
+duration = cog_registry.load(bot, "system")
+print(f"System cog loaded ({duration * 1000:.0f} ms)")
 
 for extension in config.extensions:
-    bot.load_extension(f"cogs.{extension}")
-    print(f"{extension} loaded")
+    duration = cog_registry.load(bot, extension)
+    print(f"{extension} loaded ({duration * 1000:.0f} ms)")
+
+slowest = sorted(cog_registry.cogs.values(), key=lambda info: info.load_duration or 0, reverse=True)[:5]
+print(
+    f"Startup took {(time.perf_counter() - startup) * 1000:.0f} ms, slowest cogs: "
+    + ", ".join(f"{info.module} ({info.load_duration * 1000:.0f} ms)" for info in slowest if info.loaded)
+)
 
 bot.run(config.key)
@@ -0,0 +1,200 @@
+"""Benchmark of IOS output parsers on generated outputs of a busy server.
+
+Compares the parsers of features/ios_parser.py with the previous implementation
+(split every line and strptime every date), checks both give the same results
+and prints their run times. Usage:
+
+    python tests/benchmark_ios_parser.py [lines per output] [repeats]
+"""
+
+import datetime
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from features import ios_parser  # noqa: E402
+
+MONTH_NAMES = list(ios_parser.MONTHS)
+
+
+# previous implementation from cogs/ios.py
+def old_running_for(time):
+    now = datetime.datetime.now()
+    time = time.split(':')
+    if len(time) == 2:
+        hours = now.hour - int(time[0])
+        minutes = now.minute - int(time[1])
+        return hours * 60 + minutes
+    else:
+        date = datetime.datetime.strptime(time[0], "%b%d")
+        minutes = (now - date.replace(year=now.year)).total_seconds() // 60
+        # subtracting a day as to assume it was ran right before midnight
+        return minutes - 1440
+
+
+def old_unchanged_for(date, format_str):
+    now = datetime.datetime.now()
+    date = datetime.datetime.strptime(date, format_str)
+    return (now - date.replace(year=now.year)).total_seconds() // 60
+
+
+def old_parse_memory(memory):
+    parsed = {}
+    for line in memory.strip().splitlines():
+        line = line.split()
+        login = line[1]
+        if not login.startswith('x'):
+            continue
+        last_change = " ".join(line[-3:])
+        since_last_change = old_unchanged_for(last_change, '%b %d %H:%M:%S')
+        if since_last_change > 10:
+            if login not in parsed:
+                parsed[login] = list()
+            parsed[login].append(since_last_change)
+    return parsed
+
+
+def old_parse_semaphores(semaphores):
+    parsed = {}
+    parsed_files = {}
+    if "soubory semaforu" in semaphores:
+        semaphores, files = semaphores.split("soubory semaforu:\n")
+    else:
+        files = ""
+
+    for line in semaphores.strip().splitlines():
+        line = line.split()
+        login = line[1]
+        if not login.startswith('x'):
+            continue
+        last_change = " ".join(line[-4:-1])
+        since_last_change = old_unchanged_for(last_change, '%b %d %H:%M:%S')
+        if since_last_change > 10:
+            if login not in parsed:
+                parsed[login] = list()
+            parsed[login].append(since_last_change)
+
+    for line in files.strip().splitlines():
+        line = line.split()
+        login = line[2]
+        if not login.startswith('x'):
+            continue
+        last_change = " ".join(line[5:7])
+        name = line[7]
+        since_last_change = old_unchanged_for(last_change, "%m-%d %H:%M")
+        if since_last_change > 10 or login not in name:
+            if login not in parsed_files:
+                parsed_files[login] = [list(), False]
+            parsed_files[login][0].append(since_last_change)
+            if login not in name:
+                parsed_files[login][1] = True
+
+    return parsed, parsed_files
+
+
+def old_parse_processes(processes):
+    parsed = {}
+    for line in processes.strip().splitlines():
+        line = line.split()
+        login = line[0]
+        if not login.startswith('x'):
+            continue
+        time = line[8]
+        uptime = old_running_for(time)
+        if uptime > 10:
+            if login not in parsed:
+                parsed[login] = list()
+            parsed[login].append(uptime)
+    return parsed
+
+
+def random_moment(rng: random.Random, now: datetime.datetime) -> datetime.datetime:
+    """Moment of this year before now, days are at most 28th (strptime without year rejects Feb 29)"""
+    moment = now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 120))
+    if moment.year != now.year:
+        moment = now.replace(month=1, day=1, hour=0, minute=0)
+    return moment.replace(day=min(moment.day, 28))
+
+
+def generate(lines: int, seed: int = 0):
+    """Outputs of ipcs -m, ipcs -s with ls of /dev/shm and ps aux"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now()
+    logins = [
+        f"x{''.join(rng.choice('abcdefgh') for _ in range(5))}{rng.randint(0, 99):02d}" for _ in range(300)
+    ]
+    owners = logins + ["root", "postgres"]
+
+    memory = ["------ Shared Memory Segments --------", "key        owner      shmid      perms      changed"]
+    semaphores = ["------ Semaphore Arrays --------", "key        owner      semid      perms      changed"]
+    files = []
+    processes = ["USER  PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND"]
+    for i in range(lines):
+        moment = random_moment(rng, now)
+        date = f"{MONTH_NAMES[moment.month - 1]} {moment.day:2d} {moment:%H:%M:%S}"
+        memory.append(f"0x{i:08x} {rng.choice(owners)} {i} 600 4096 {date}")
+        semaphores.append(f"0x{i:08x} {rng.choice(owners)} {i} 600 1 {date} {moment.year}")
+
+        login = rng.choice(logins)
+        name = f"sem.{login}_{i}" if rng.random() < 0.8 else f"sem.proj_{i}"
+        files.append(f"-rw-r--r-- 1 {login} {login} 32 {moment:%m-%d %H:%M} {name}")
+
+        if moment.date() == now.date():
+            start = f"{moment:%H:%M}"
+        else:
+            start = f"{MONTH_NAMES[moment.month - 1]}{moment.day:02d}"
+        processes.append(f"{rng.choice(owners)} {i} 0.0 0.1 1000 200 pts/1 S+ {start} 0:00 ./proj 1 2 3 4 5")
+
+    semaphores_output = "\n".join(semaphores) + "\nsoubory semaforu:\n" + "\n".join(files)
+    return "\n".join(memory), semaphores_output, "\n".join(processes)
+
+
+def aggregate(parsed):
+    return {login: (len(values), sum(values)) for login, values in parsed.items()}
+
+
+def check_same(old, new, name):
+    old = aggregate(old)
+    assert old, f"{name}: nothing parsed"
+    assert old.keys() == new.keys(), f"{name}: different logins"
+    for login, (count, total) in old.items():
+        assert count == new[login].count, f"{name}: different count of {login}"
+        # runs are a moment apart, a minute can change in between
+        assert abs(total - new[login].total_minutes) <= count, f"{name}: different minutes of {login}"
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    memory, semaphores, processes = generate(lines)
+
+    def run_old():
+        return old_parse_memory(memory), old_parse_semaphores(semaphores), old_parse_processes(processes)
+
+    def run_new():
+        return (
+            ios_parser.parse_memory(memory),
+            ios_parser.parse_semaphores(semaphores),
+            ios_parser.parse_processes(processes),
+        )
+
+    (old_memory, (old_sem, old_files), old_processes) = run_old()
+    (new_memory, (new_sem, new_files), new_processes) = run_new()
+    check_same(old_memory, new_memory, "memory")
+    check_same(old_sem, new_sem, "semaphores")
+    check_same({login: values for login, (values, _) in old_files.items()}, new_files, "files")
+    assert all(flag == new_files[login].login_not_in_name for login, (_, flag) in old_files.items())
+    check_same(old_processes, new_processes, "processes")
+
+    old_time = min(timeit.repeat(run_old, number=1, repeat=repeats))
+    new_time = min(timeit.repeat(run_new, number=1, repeat=repeats))
+    print(f"{lines} lines per output, best of {repeats}")
+    print(f"old parsers: {old_time * 1000:.1f} ms")
+    print(f"new parsers: {new_time * 1000:.1f} ms ({old_time / new_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
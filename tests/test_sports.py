@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from features.sports import Semester, VutSports
+
+FIXTURES = Path(__file__).parent / "fixtures" / "sports"
+
+
+def load(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+
+def soup(name: str) -> BeautifulSoup:
+    return BeautifulSoup(load(name), "lxml")
+
+
+@pytest.mark.parametrize("fixture, pages", [
+    ("no_pagination.html", 1),
+    ("single_page.html", 1),
+    ("listing.html", 12),
+])
+def test_number_of_pages(fixture, pages):
+    assert VutSports.number_of_pages(soup(fixture)) == pages
+
+
+def test_parse_sports():
+    output = {}
+    VutSports.parse_sports(soup("listing.html"), output)
+
+    assert output == {
+        "240001": {"name": "Fotbal", "shortcut": "TV-FOT", "semester": Semester.ZS, "subject_id": "240001"},
+        "240002": {"name": "Plavání", "shortcut": "TV-PLA", "semester": Semester.LS, "subject_id": "240002"},
+        "240003": {
+            "name": "Volejbal pro pokročilé",
+            "shortcut": "TV-VOLP",
+            "semester": Semester.ZS,
+            "subject_id": "240003",
+        },
+    }
+
+
+def test_parse_sports_without_sports():
+    output = {}
+    VutSports.parse_sports(soup("no_sports.html"), output)
+    assert output == {}
+
+
+def test_parse_sports_merges_semesters():
+    output = {}
+    VutSports.parse_sports(soup("listing.html"), output)
+    VutSports.parse_sports(soup("listing_page2.html"), output)
+
+    assert output["240001"]["semester"] == Semester.LSZS
+    assert output["240004"]["semester"] == Semester.ZS
+    assert len(output) == 4
+
+
+def test_parse_pages():
+    output = {}
+    pages = VutSports.parse_pages([load("listing.html"), load("listing_page2.html")], output)
+
+    assert pages == 12
+    assert sorted(output) == ["240001", "240002", "240003", "240004"]
+
+
+def test_parse_pages_single_page():
+    output = {}
+    assert VutSports.parse_pages([load("single_page.html")], output) == 1
+    assert output["240005"]["name"] == "Šachy"
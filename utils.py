@@ -6,9 +6,6 @@ import math
 from disnake import Member, PartialEmoji, Emoji
 from disnake.ext import commands
 from sqlalchemy.schema import Table
-import os
-import re
-from genericpath import isfile
 
 from config.app_config import config
 from config.messages import Messages
@@ -232,22 +229,6 @@ def make_pts_column_row_formatter(pts_column_name: str):
     return formatter
 
 
-def get_all_cogs():
-    """Returns all available cogs with their class names as ordered dict."""
-    all_cogs = {}
-    pattern = r"class (.*)\(commands\.Cog\):"
-    for name in os.listdir("./cogs"):
-        filename = f"./cogs/{name}"
-        if isfile(filename) and filename.endswith(".py"):
-            with open(filename, "r") as file:
-                for line in file:
-                    if re.search(pattern, line):
-                        result = re.search(pattern, line)
-                        all_cogs[name[:-3]] = result.group(1)
-                        break
-    return {key: all_cogs[key] for key in sorted(all_cogs.keys())}
-
-
 def split(array, k):
     """Splits list into K parts of approximate equal length"""
     n = len(array)